@@ -3,43 +3,83 @@
 login.py - versão comentada e com type annotations.
 
 Este módulo fornece:
-- funções utilitárias para armazenar/verificar usuários locais (com PBKDF2 + salt),
+- funções utilitárias para armazenar/verificar usuários locais (com scrypt/PBKDF2 + salt),
 - a classe LoginScreen (Kivy Screen) que expõe:
     - fazer_login(username, password)
     - criar_conta_popup()
     - handlers para Tab/Enter (mudar foco e submeter)
     - popups informativos
 O armazenamento é persistente no diretório de dados do usuário
-(e.g. %APPDATA%/RegistroAtividades/users.json no Windows).
+(e.g. %APPDATA%/RegistroAtividades/users.mpk no Windows), serializado em MessagePack.
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, Callable
 import os
 import sys
 import json
 import base64
 import hashlib
+import hmac
 import secrets
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
 from pathlib import Path
 
+import msgpack
+
 from kivy.uix.screenmanager import Screen
 from kivy.uix.popup import Popup
 from kivy.uix.label import Label
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.core.window import Window
 
+# Algoritmo do HMAC usado no PBKDF2 para novas contas e para registros antigos (sem campo "algo")
+DEFAULT_HASH_ALGO: str = "sha512"
+LEGACY_HASH_ALGO: str = "sha256"
+
+# KDF usado para novas contas: scrypt (memory-hard) quando o OpenSSL do Python o oferece,
+# caso contrário PBKDF2. Registros sem campo "kdf" são PBKDF2.
+DEFAULT_KDF: str = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2"
+SCRYPT_N: int = 2 ** 14  # custo (CPU/memória ~16 MiB com r=8)
+SCRYPT_R: int = 8
+SCRYPT_P: int = 1
+SCRYPT_DKLEN: int = 32   # tamanho (bytes) da chave derivada pelo scrypt
+
+# Tamanho (bytes) da chave derivada pelo PBKDF2 para cada algoritmo (= digest do HMAC)
+_PBKDF2_DKLEN: Dict[str, int] = {"sha256": 32, "sha512": 64}
+
+# Ficheiro de credenciais (MessagePack) e o antigo users.json, migrado na primeira leitura
+USER_STORE_NAME: str = "users.mpk"
+LEGACY_STORE_NAME: str = "users.json"
+
+# Cache do users.mpk já interpretado: (st_mtime_ns, usuários). Evita reler/parsear o
+# ficheiro a cada tentativa de login enquanto ele não for modificado.
+_users_cache: Optional[Tuple[int, Dict[str, Dict[str, Any]]]] = None
+
+# Intervalo mínimo (segundos) entre tentativas de login (ex.: Enter segurado com auto-repeat)
+LOGIN_MIN_INTERVAL: float = 0.25
+
+# Códigos de tecla tratados por LoginScreen._on_key_down
+_TAB_KEY: int = 9
+_ENTER_KEYS: frozenset = frozenset((13, 271))  # Enter e Enter do teclado numérico
+
 # -------------------------
 # Utilitários de persistência
 # -------------------------
 
 
+@lru_cache(maxsize=1)
 def get_user_store_path() -> Path:
     """
-    Retorna o caminho para o ficheiro users.json usado para persistir credenciais.
+    Retorna o caminho para o ficheiro users.mpk usado para persistir credenciais.
     Escolhe diretório apropriado por plataforma:
-      - Windows: %APPDATA%/RegistroAtividades/users.json
-      - macOS: ~/Library/Application Support/RegistroAtividades/users.json
-      - Linux: ~/.local/share/RegistroAtividades/users.json
+      - Windows: %APPDATA%/RegistroAtividades/users.mpk
+      - macOS: ~/Library/Application Support/RegistroAtividades/users.mpk
+      - Linux: ~/.local/share/RegistroAtividades/users.mpk
     Garante que a pasta exista.
+    O resultado é memorizado: a resolução e o mkdir acontecem uma única vez por processo.
     """
     # detectar plataforma e escolher base path
     if sys.platform.startswith("win"):
@@ -55,75 +95,242 @@ def get_user_store_path() -> Path:
      # criar pasta específica da aplicação e garantir existência
     folder = Path(base) / "RegistroAtividades"
     folder.mkdir(parents=True, exist_ok=True) # cria se não existir
-    # devolver o caminho completo para users.json
-    return folder / "users.json"
+    # devolver o caminho completo para users.mpk
+    return folder / USER_STORE_NAME
+
 
+def hash_password(password: str, salt: Optional[bytes] = None, iterations: int = 210_000,
+                  kdf: str = DEFAULT_KDF) -> Dict[str, Any]:
+    """
+    Gera o registro (KDF, salt, hash e parâmetros) para a senha em texto puro.
+    Codifica a senha uma vez e delega a _hash_bytes.
+    """
+    return _hash_bytes(password.encode('utf-8'), salt, iterations, kdf)
 
-def hash_password(password: str, salt: Optional[bytes] = None, iterations: int = 200_000) -> Dict[str, Any]:
+def _hash_bytes(pwd: bytes, salt: Optional[bytes] = None, iterations: int = 210_000,
+                kdf: str = DEFAULT_KDF) -> Dict[str, Any]:
     """
-    Gera um registro contendo salt (base64), hash (base64) e numero de iteracoes.
-    - password: senha em texto puro
+    Gera um registro contendo o KDF usado, salt e hash (bytes crus) e seus parâmetros.
+    - pwd: senha já codificada em UTF-8
     - salt: bytes opcionais (se None, gera novo salt seguro com secrets.token_bytes)
     - iterations: número de iterações PBKDF2 (aumente para maior resistência)
-    Retorna dicionário: {"salt": ..., "hash": ..., "iters": iterations}
+    - kdf: "scrypt" (padrão quando disponível) ou "pbkdf2"
+    Retorna dicionário:
+      scrypt -> {"kdf": "scrypt", "salt": ..., "hash": ..., "n": ..., "r": ..., "p": ...}
+      pbkdf2 -> {"kdf": "pbkdf2", "salt": ..., "hash": ..., "iters": iterations, "algo": "sha512"}
     """
     # gerar salt se não fornecido
     if salt is None:
         salt = secrets.token_bytes(16) # 16 bytes = 128 bits de salt
-    # codificar senha para bytes
-    pwd = password.encode('utf-8')
-    # executar PBKDF2-HMAC-SHA256
-    dk = hashlib.pbkdf2_hmac('sha256', pwd, salt, iterations)
-    # retornar salt e hash codificados em base64 para fácil serialização JSON
+
+    if kdf == "scrypt":
+        # scrypt (OpenSSL): memory-hard, resiste melhor a ataques com GPU
+        dk = hashlib.scrypt(pwd, salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=SCRYPT_DKLEN)
+        return {
+            "kdf": "scrypt",
+            "salt": salt,
+            "hash": dk,
+            "n": SCRYPT_N,
+            "r": SCRYPT_R,
+            "p": SCRYPT_P
+        }
+
+    # executar PBKDF2-HMAC-SHA512 (operações de 64 bits: mais rápido por iteração em CPUs 64-bit)
+    dk = hashlib.pbkdf2_hmac(DEFAULT_HASH_ALGO, pwd, salt, iterations)
+    # retornar salt e hash como bytes (o MessagePack os grava como binário, sem base64)
     return {
-        "salt": base64.b64encode(salt).decode('ascii'),
-        "hash": base64.b64encode(dk).decode('ascii'),
-        "iters": iterations
+        "kdf": "pbkdf2",
+        "salt": salt,
+        "hash": dk,
+        "iters": iterations,
+        "algo": DEFAULT_HASH_ALGO
     }
 
-def verify_password(password: str, salt_b64: str, hash_b64: str, iterations: int) -> bool:
+def _verify_bytes(pwd: bytes, salt: bytes, expected: bytes, iterations: int, algo: str = LEGACY_HASH_ALGO) -> bool:
     """
-    Verifica se a senha fornecida corresponde ao hash/salt armazenados.
-    - password: senha em texto puro a verificar
-    - salt_b64, hash_b64: strings em base64 recuperadas do armazenamento
-    - iterations: número de iterações usadas
-    Retorna True se coincidir, False caso contrário.
+    Verifica se a senha (já codificada em UTF-8) corresponde ao hash/salt PBKDF2 armazenados.
+    - algo: algoritmo do HMAC usado no PBKDF2 (registros antigos não têm o campo -> sha256)
+    Um hash armazenado com tamanho diferente do digest é registro corrompido:
+    retorna False sem rodar o KDF.
     """
-    # decodificar salt e hash de base64 para bytes
-    salt = base64.b64decode(salt_b64)
-    expected = base64.b64decode(hash_b64)
+    if len(expected) != _PBKDF2_DKLEN.get(algo, len(expected)):
+        return False
     # recalcular derived key com os mesmos parâmetros
-    dk = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    dk = hashlib.pbkdf2_hmac(algo, pwd, salt, iterations)
     # usar compare_digest para mitigar timing attacks
-    return secrets.compare_digest(dk, expected)
+    return hmac.compare_digest(dk, expected)
+
+def _verify_scrypt_bytes(pwd: bytes, salt: bytes, expected: bytes, n: int, r: int, p: int) -> bool:
+    """
+    Verificação para registros gerados com scrypt; a senha chega já codificada em UTF-8.
+    - n, r, p: parâmetros de custo armazenados no registro
+    Hash armazenado com tamanho inesperado (registro corrompido) retorna False sem rodar o KDF.
+    """
+    if len(expected) != SCRYPT_DKLEN:
+        return False
+    dk = hashlib.scrypt(pwd, salt=salt, n=n, r=r, p=p, dklen=SCRYPT_DKLEN)
+    return hmac.compare_digest(dk, expected)
+
+def _verify_record_bytes(pwd: bytes, record: Dict[str, Any]) -> bool:
+    """
+    Verifica a senha (já codificada em UTF-8) contra um registro de users.mpk, escolhendo
+    o KDF pelo campo "kdf" (registros antigos, sem o campo, são PBKDF2).
+    """
+    salt: bytes = record["salt"]
+    expected: bytes = record["hash"]
+    if record.get("kdf") == "scrypt":
+        return _verify_scrypt_bytes(
+            pwd,
+            salt,
+            expected,
+            int(record["n"]),
+            int(record["r"]),
+            int(record["p"])
+        )
+    return _verify_bytes(
+        pwd,
+        salt,
+        expected,
+        int(record.get("iters", 200000)),
+        record.get("algo", LEGACY_HASH_ALGO)
+    )
+
+def verify_password(password: str, record: Dict[str, Any]) -> bool:
+    """
+    Verifica a senha em texto puro contra um registro de users.mpk (scrypt ou PBKDF2).
+    Codifica a senha uma vez e delega a _verify_record_bytes.
+    """
+    return _verify_record_bytes(password.encode('utf-8'), record)
+
+def _decode_legacy_records(users: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Converte registros antigos, com salt/hash em base64 (str), para bytes crus.
+    A conversão é feita no próprio dicionário, então o próximo save_users já grava o formato novo.
+    """
+    for record in users.values():
+        try:
+            if isinstance(record.get("salt"), str):
+                record["salt"] = base64.b64decode(record["salt"])
+            if isinstance(record.get("hash"), str):
+                record["hash"] = base64.b64decode(record["hash"])
+        except Exception:
+            # registro corrompido: _verify_record_bytes vai falhar e negar o login
+            pass
 
 def load_users() -> Dict[str, Dict[str, Any]]:
     """
-    Carrega o ficheiro users.json e retorna um dicionário de usuários.
-    Estrutura: { username: {"salt": "...", "hash": "...", "iters": 200000}, ... }
-    Se o ficheiro não existir, retorna um dicionário vazio.
+    Carrega o ficheiro users.mpk e retorna um dicionário de usuários.
+    Estrutura: { username: {"kdf": "scrypt", "salt": b"...", "hash": b"...", "n": 16384, "r": 8, "p": 1}, ... }
+    (registros PBKDF2 usam "iters"/"algo" no lugar de "n"/"r"/"p")
+    Se o ficheiro não existir, migra o users.json antigo (se houver) ou retorna um dicionário vazio.
+    O conteúdo fica em cache e só é relido quando o mtime do ficheiro muda.
     """
+    global _users_cache
     path = get_user_store_path()
-    # se não existir, retorna vazio (primeira execução)
-    if not path.exists():
-        return {}  # vazio
     try:
-        # abrir e ler JSON
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        # se não existir: migrar users.json de versões anteriores ou retornar vazio (primeira execução)
+        return _migrate_legacy_store(path)
+    # ficheiro não mudou desde a última leitura: devolve cópia do cache
+    if _users_cache is not None and _users_cache[0] == mtime:
+        return dict(_users_cache[1])
+    try:
+        # ler bytes e decodificar MessagePack
+        users = msgpack.unpackb(path.read_bytes(), raw=False)
     except Exception:
         # em caso de erro (arquivo corrompido, permission), retornar vazio para não quebrar app
         return {}
+    _decode_legacy_records(users)
+    _users_cache = (mtime, users)
+    return dict(users)
+
+def _migrate_legacy_store(path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Converte o users.json (formato antigo) em users.mpk e renomeia o original para users.json.bak.
+    Retorna os usuários lidos, ou um dicionário vazio se não houver ficheiro antigo legível.
+    """
+    legacy = path.with_name(LEGACY_STORE_NAME)
+    try:
+        users: Dict[str, Dict[str, Any]] = json.loads(legacy.read_bytes())
+    except Exception:
+        # sem users.json (primeira execução) ou ilegível
+        return {}
+    _decode_legacy_records(users)
+    try:
+        save_users(users)
+        os.replace(legacy, legacy.with_name(LEGACY_STORE_NAME + ".bak"))
+    except OSError:
+        # não foi possível gravar/renomear: segue com os dados em memória e tenta de novo na próxima leitura
+        pass
+    return dict(users)
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Grava `data` em `path` de forma atômica: escreve num ficheiro temporário ao lado,
+    faz fsync e só então o renomeia por cima do original (os.replace).
+    Uma queda no meio da gravação deixa o users.mpk anterior intacto.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    # remove temporário órfão de uma gravação interrompida anteriormente
+    tmp.unlink(missing_ok=True)
+    fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o600)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        # falhou antes do rename: descartar o temporário e propagar o erro
+        tmp.unlink(missing_ok=True)
+        raise
+
+    # fsync da pasta para persistir o rename (não suportado no Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(path.parent, os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
 
 def save_users(users: Dict[str, Dict[str, Any]]) -> None:
     """
-    Persiste o dicionário de usuários (users) no ficheiro users.json.
-    Sobrescreve o anterior de forma atômica (melhoria possível: escrever temp + rename).
+    Persiste o dicionário de usuários (users) no ficheiro users.mpk (MessagePack).
+    Sobrescreve o anterior de forma atômica (temp + fsync + rename, ver _atomic_write_bytes).
+    Atualiza o cache de load_users com o conteúdo recém-gravado.
     """
+    global _users_cache
     path = get_user_store_path()
-    # abrir em modo escrita e dump JSON formatado
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+    # serializar em MessagePack (salt/hash como binário) e gravar os bytes
+    _atomic_write_bytes(path, msgpack.packb(users, use_bin_type=True))
+    _users_cache = (path.stat().st_mtime_ns, dict(users))
+
+# Classes de widget usadas no popup de criação de conta, importadas uma única vez (_get_widgets)
+_PopupWidgets = namedtuple("_PopupWidgets", ("BoxLayout", "TextInput", "Button", "Label"))
+_WIDGETS: Optional[_PopupWidgets] = None
+
+def _get_widgets() -> _PopupWidgets:
+    """
+    Importa (na primeira chamada) e devolve as classes de widget do popup de criação de conta.
+    Mantém o import fora do carregamento do módulo, mas sem repeti-lo a cada popup.
+    """
+    global _WIDGETS
+    if _WIDGETS is None:
+        from kivy.uix.boxlayout import BoxLayout
+        from kivy.uix.textinput import TextInput
+        from kivy.uix.button import Button
+        _WIDGETS = _PopupWidgets(BoxLayout, TextInput, Button, Label)
+    return _WIDGETS
 
 # -------------------------
 # Classe de autenticação (Kivy Screen)
@@ -134,25 +341,43 @@ class LoginScreen(Screen):
     LoginScreen: tela de login e criação de conta local.
 
     Principais funcionalidades:
-    - fazer_login(username, password): valida localmente usando users.json
+    - fazer_login(username, password): valida localmente usando users.mpk
     - criar_conta_popup(): popup para criar novo usuário (gera salt+hash e salva)
     - tratamento de teclas Tab/Enter para melhorar UX
 
     Observação de segurança:
-    - As senhas não são armazenadas em texto claro; utiliza PBKDF2-HMAC-SHA256 com salt.
+    - As senhas não são armazenadas em texto claro; utiliza scrypt (ou PBKDF2-HMAC-SHA512) com salt
+      (registros antigos em PBKDF2-HMAC-SHA256 continuam válidos).
     - Ainda assim, armazenamento local em arquivo pode ser extraído por usuários com acesso ao sistema.
     - Para produção/escala, use backend centralizado e autenticação segura.
     """
+    # Anotações de tipo para atributos de instância
+    _login_in_flight: bool = False   # há uma verificação de senha rodando na thread
+    _last_attempt_ts: float = 0.0    # time.monotonic() da última tentativa de login
+    _key_down_handler: Optional[Callable[..., bool]] = None  # handler ligado em Window.on_key_down
+    _u: Optional[Any] = None  # TextInput de usuário (cache de self.ids.username)
+    _p: Optional[Any] = None  # TextInput de senha (cache de self.ids.password)
+    _error_popup: Optional[Popup] = None  # popup de erro reutilizado por show_error
+    _error_label: Optional[Label] = None
+    _info_popup: Optional[Popup] = None   # popup informativo reutilizado por _show_info
+    _info_label: Optional[Label] = None
 
     def fazer_login(self, username: str, password: str) -> None:
         """
         Tenta autenticar o usuário localmente:
         - limpa espaços
-        - carrega users.json
+        - carrega users.mpk
         - se usuário não existir -> mensagem
-        - senão, verifica senha via verify_password
-        - em caso de sucesso, define app.user_id e troca para a tela 'main'
+        - senão, verifica senha via _verify_record_bytes (scrypt ou PBKDF2) em thread separada
+        - em caso de sucesso (_login_done), define app.user_id e troca para a tela 'main'
+        Ignora a chamada se já houver uma verificação em andamento ou se a última tentativa
+        foi há menos de LOGIN_MIN_INTERVAL segundos.
         """
+        now = time.monotonic()
+        if self._login_in_flight or now - self._last_attempt_ts < LOGIN_MIN_INTERVAL:
+            return
+        self._last_attempt_ts = now
+
         # normalizar inputs (evita None)
         username = (username or "").strip()
         password = (password or "").strip()
@@ -171,27 +396,38 @@ class LoginScreen(Screen):
             self.show_error("Usuário não encontrado. Cadastre-se primeiro.")
             return
         
+        # verificar senha numa thread (o KDF leva centenas de ms e travaria a UI);
+        # o resultado volta para a thread principal via Clock em _login_done
+        self._login_in_flight = True
+        pwd_bytes: bytes = password.encode('utf-8')  # codificada uma única vez
+        threading.Thread(target=self._verify_worker, args=(username, pwd_bytes, record), daemon=True).start()
+
+    def _verify_worker(self, username: str, pwd_bytes: bytes, record: Dict[str, Any]) -> None:
+        """
+        Executado em thread separada: roda o KDF (o hashlib libera o GIL durante o cálculo)
+        e agenda _login_done na thread da UI.
+        """
         # verificar senha com tratamento de exceção
         try:
-            ok: bool= verify_password(
-                password, 
-                record["salt"], 
-                record["hash"], 
-                int(record.get("iters", 200000))
-                )
-        
+            ok: bool = _verify_record_bytes(pwd_bytes, record)
         except Exception:
             # em caso de qualquer erro (dados corrompidos) considerar inválido
             ok = False
+        Clock.schedule_once(lambda _dt: self._login_done(ok, username), 0)
 
+    def _login_done(self, ok: bool, username: str) -> None:
+        """
+        Conclui o login na thread da UI, após a verificação da senha.
+        """
+        self._login_in_flight = False
         if ok:
             # login bem sucedido: pegar instância do app e navegar para main
             app = App.get_running_app()
             app.user_id = username           # armazenar user_id na App
+            main_screen = app.ensure_main_screen()  # cria a MainScreen na primeira vez
             app.sm.current = 'main'          # trocar para a tela principal
             try:
-                # tentar disparar carregamento das atividades na main screen (se existir)
-                main_screen = app.sm.get_screen('main')
+                # tentar disparar carregamento das atividades na main screen
                 main_screen.carregar_atividades()
             except Exception:
                 # falha em notificar main screen é não-fatal aqui
@@ -199,46 +435,41 @@ class LoginScreen(Screen):
         else:
             # senha incorreta: informar usuário e limpar campo senha (se existir)
             self.show_error("Usuário ou senha incorretos.")
-            try:
-                self.ids.password.text = ""
-            except Exception:
-                pass
+            if self._p is not None:
+                self._p.text = ""
 
     def criar_conta_popup(self) -> None:
         """
         Abre um Popup simples para criar nova conta local.
         O popup contém campos: username, password, confirm_password.
         - valida preenchimento, igualdade de senhas e unicidade de usuário.
-        - gera hash+salt via hash_password e salva em users.json
+        - gera hash+salt via _hash_bytes e salva em users.mpk
         """
-        # imports locais para widget creation (evita import no topo se não usado)
-        from kivy.uix.boxlayout import BoxLayout
-        from kivy.uix.textinput import TextInput
-        from kivy.uix.button import Button
-        from kivy.uix.label import Label
+        # classes de widget (importadas só na primeira vez que o popup é aberto)
+        W = _get_widgets()
 
         # construir layout vertical do popup
-        layout = BoxLayout(orientation='vertical', padding=8, spacing=8)
+        layout = W.BoxLayout(orientation='vertical', padding=8, spacing=8)
 
         # etiqueta e campo de usuário
-        layout.add_widget(Label(text="Novo usuário:"))
-        username_input = TextInput(multiline=False)
+        layout.add_widget(W.Label(text="Novo usuário:"))
+        username_input = W.TextInput(multiline=False)
         layout.add_widget(username_input)
 
         # etiqueta e campo de senha
-        layout.add_widget(Label(text="Senha:"))
-        password_input = TextInput(password=True, multiline=False)
+        layout.add_widget(W.Label(text="Senha:"))
+        password_input = W.TextInput(password=True, multiline=False)
         layout.add_widget(password_input)
 
         # etiqueta e campo de confirmação de senha
-        layout.add_widget(Label(text="Confirmar senha:"))
-        confirm_input = TextInput(password=True, multiline=False)
+        layout.add_widget(W.Label(text="Confirmar senha:"))
+        confirm_input = W.TextInput(password=True, multiline=False)
         layout.add_widget(confirm_input)
 
         # botões OK / Cancel em linha
-        buttons = BoxLayout(size_hint_y=None, height=40, spacing=8)
-        ok_btn = Button(text="Criar")
-        cancel_btn = Button(text="Cancelar")
+        buttons = W.BoxLayout(size_hint_y=None, height=40, spacing=8)
+        ok_btn = W.Button(text="Criar")
+        cancel_btn = W.Button(text="Cancelar")
         buttons.add_widget(ok_btn)
         buttons.add_widget(cancel_btn)
         layout.add_widget(buttons)
@@ -271,8 +502,29 @@ class LoginScreen(Screen):
                 self.show_error("Usuário já existe. Escolha outro nome.")
                 return
             
-            # gerar hash + salt e salvar no dicionário
-            rec: Dict[str, Any] = hash_password(pwd)
+            # gerar hash + salt numa thread para não travar a UI; salvar de volta na thread principal
+            ok_btn.disabled = True
+            threading.Thread(target=hash_worker, args=(user, pwd.encode('utf-8')), daemon=True).start()
+
+        def hash_worker(user: str, pwd_bytes: bytes) -> None:
+            try:
+                rec: Dict[str, Any] = _hash_bytes(pwd_bytes)
+            except Exception as e:
+                Clock.schedule_once(lambda _dt, err=e: on_hash_failed(err), 0)
+                return
+            Clock.schedule_once(lambda _dt: on_hashed(user, rec), 0)
+
+        def on_hash_failed(e: Exception) -> None:
+            ok_btn.disabled = False
+            self.show_error(f"Falha ao gerar hash da senha: {e}")
+
+        def on_hashed(user: str, rec: Dict[str, Any]) -> None:
+            ok_btn.disabled = False
+            # recarregar usuários (o ficheiro pode ter mudado enquanto o hash era calculado)
+            users: Dict[str, Dict[str, Any]] = load_users()
+            if user in users:
+                self.show_error("Usuário já existe. Escolha outro nome.")
+                return
             users[user] = rec
             try:
                 # salvar persistente
@@ -296,16 +548,24 @@ class LoginScreen(Screen):
     def _show_info(self, message: str) -> None:
         """
         Mostra um popup informativo (não-erro).
+        O Popup é criado na primeira chamada e reutilizado (só o texto muda).
         """
-        popup = Popup(title='Info', content=Label(text=message), size_hint=(0.8, 0.4))
-        popup.open()
+        if self._info_popup is None:
+            self._info_label = Label(text=message)
+            self._info_popup = Popup(title='Info', content=self._info_label, size_hint=(0.8, 0.4))
+        self._info_label.text = message
+        self._info_popup.open()
 
     def show_error(self, message: str) -> None:
         """
         Mostra um popup de erro com a mensagem fornecida.
+        O Popup é criado na primeira chamada e reutilizado (só o texto muda).
         """
-        popup = Popup(title='Erro', content=Label(text=message), size_hint=(0.8, 0.4))
-        popup.open()
+        if self._error_popup is None:
+            self._error_label = Label(text=message)
+            self._error_popup = Popup(title='Erro', content=self._error_label, size_hint=(0.8, 0.4))
+        self._error_label.text = message
+        self._error_popup.open()
 
     # -------------------------
     # Handlers de teclado (Tab/Enter)
@@ -315,63 +575,61 @@ class LoginScreen(Screen):
         """
         Vincula o handler de teclado quando a tela vai aparecer.
         Isso permite capturar Tab/Enter e melhorar a navegação do usuário.
+        Guarda a referência exata do bound method para que on_leave desvincule o mesmo objeto,
+        e guarda referências diretas aos campos para o handler não consultar self.ids a cada tecla.
         """
-        Window.bind(on_key_down=self._on_key_down)
+        self._u = self.ids.get('username')
+        self._p = self.ids.get('password')
+        if self._key_down_handler is None:
+            self._key_down_handler = self._on_key_down
+            Window.bind(on_key_down=self._key_down_handler)
 
     def on_leave(self, *args: Any) -> None:
         """
         Desvincula o handler quando a tela deixa de estar ativa,
         evitando múltiplas ligações e efeitos colaterais.
         """
-        try:
-            Window.unbind(on_key_down=self._on_key_down)
-        except Exception:
-            # se já foi desvinculado, ignora
-            pass
+        if self._key_down_handler is not None:
+            Window.unbind(on_key_down=self._key_down_handler)
+            self._key_down_handler = None
 
     def _on_key_down(self, window: Any, key: int, scancode: int, codepoint: Optional[str], modifiers: Any) -> bool:
         """
         Handler global de key_down:
-        - Tab (key == 9 ou codepoint == '\\t'): troca foco entre username e password
-        - Enter/Return (key == 13 ou codepoint em '\\r'|'\\n'): submete o formulário se ambos preenchidos
+        - Tab (key == 9): troca foco entre username e password
+        - Enter/Return (key em _ENTER_KEYS: 13 ou 271 do teclado numérico): submete o formulário se ambos preenchidos
         Retorna True se tratou a tecla, False caso contrário.
         """
-        # proteção geral para evitar que exceções atrapalhem o loop de eventos
-        try:
-            # Tab: alterna foco entre os campos
-            if key == 9 or codepoint == '\t':
-                try:
-                    if self.ids.username.focus:
-                        # mover foco do username para password
-                        self.ids.username.focus = False
-                        self.ids.password.focus = True
-                    elif self.ids.password.focus:
-                        # mover foco de password para username
-                        self.ids.password.focus = False
-                        self.ids.username.focus = True
-                    else:
-                        # nenhum tinha foco: setar no username
-                        self.ids.username.focus = True
-                except Exception:
-                    # se ids não existirem, ignora
-                    pass
-                return True
-
-            # Enter/Return: tenta submeter se ambos campos preenchidos
-            if key == 13 or (codepoint in ('\r', '\n') if codepoint is not None else False):
-                try:
-                    u: str = self.ids.username.text.strip()
-                    p: str = self.ids.password.text.strip()
-                    if u and p:
-                        # submeter login
-                        self.fazer_login(u, p)
-                except Exception:
-                    pass
-                return True
-
-        except Exception:
-            # evitar que exceções não tratadas quebrem o event loop
-            pass
+        user_in, pwd_in = self._u, self._p
+        # campos não resolvidos em on_pre_enter: deixa o comportamento padrão
+        if user_in is None or pwd_in is None:
+            return False
+
+        # Tab: alterna foco entre os campos
+        if key == _TAB_KEY:
+            if user_in.focus:
+                # mover foco do username para password
+                user_in.focus = False
+                pwd_in.focus = True
+            elif pwd_in.focus:
+                # mover foco de password para username
+                pwd_in.focus = False
+                user_in.focus = True
+            else:
+                # nenhum tinha foco: setar no username
+                user_in.focus = True
+            return True
+
+        # Enter/Return: tenta submeter se ambos campos preenchidos
+        if key in _ENTER_KEYS:
+            # teste rápido antes do strip: campos vazios não submetem
+            if user_in.text and pwd_in.text:
+                u: str = user_in.text.strip()
+                p: str = pwd_in.text.strip()
+                if u and p:
+                    # submeter login
+                    self.fazer_login(u, p)
+            return True
 
         # não tratado: retornar False para permitir comportamento padrão
         return False
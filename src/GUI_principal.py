@@ -1,24 +1,46 @@
 # Tela Principal da Aplicação
 
-from typing import Optional, Any, List, Dict  # typing helpers
+from typing import Optional, Any, List, Dict, Tuple, Callable  # typing helpers
 from kivy.uix.screenmanager import Screen     # tela base do Kivy
 from kivy.uix.popup import Popup               # para popups de erro/sucesso
 from kivy.uix.label import Label               # rótulos/textos
 from kivy.uix.togglebutton import ToggleButton # botões que mantêm estado (down/normal)
 from kivy.uix.button import Button             # botão normal (ainda usado em KV)
+from kivy.properties import StringProperty     # textos observados pelo KV
 from kivymd.app import MDApp                   # app KivyMD para pegar user_id e app instance
 import src.handle_db as db                     # módulo de acesso a dados (Supabase)
 
 # Imports para finalização automática das atividades
 from kivy.clock import Clock
-from datetime import datetime, date
-import threading
+from datetime import datetime, date, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Cores (RGBA 0-1): ajuste como preferir
 NORMAL_COLOR: tuple = (1, 1, 1, 1)            # cor normal do botão (branco)
 SELECTED_COLOR: tuple = (0.2, 0.6, 0.2, 1)    # cor quando selecionado (verde)
 DISABLED_COLOR: tuple = (0.7, 0.7, 0.7, 1)    # cor quando desabilitado (cinza claro)
 
+# Tipos de atividade predefinidos (pode ser externalizado para config)
+ACTIVITY_TYPES: Tuple[str, ...] = (
+    "Pesquisa e Desenvolvimento",
+    "Atendimento de Fábrica",
+    "Documentação",
+    "Gabaritos e Dispositivos",
+    "Cadastro",
+    "Reuniões",
+    "Custos",
+    "Finame",
+    "RNC",
+    "Outros",
+)
+
+# Horários (hora, minuto) em que a atividade em andamento é finalizada automaticamente
+AUTO_FINALIZE_TIMES: Tuple[Tuple[int, int], ...] = ((11, 28), (16, 10))
+# Rótulo "HH:MM" de cada horário, formatado uma única vez (evita strftime a cada agendamento)
+AUTO_FINALIZE_LABELS: Dict[Tuple[int, int], str] = {
+    hm: f"{hm[0]:02d}:{hm[1]:02d}" for hm in AUTO_FINALIZE_TIMES
+}
+
 class MainScreen(Screen):
     """
     MainScreen: tela principal onde o usuário seleciona tipos de atividade,
@@ -32,14 +54,20 @@ class MainScreen(Screen):
 
     Observação:
     - Espera-se que o arquivo KV contenha widgets com ids:
-      'activity_buttons', 'selected_activity_label', 'descricao_text',
-      'status_label', 'start_button', 'end_button', 'active_box', 'active_label'
+      'activity_buttons', 'descricao_text', 'start_button', 'end_button',
+      'active_box', 'active_label'
+    - Os labels de seleção e de status são ligados no próprio KV a
+      selected_text/status_text.
     """
     # Anotações de tipo para atributos de instância
     current_activity_id: Optional[int] = None           # id da atividade em andamento (se houver)
     selected_activity_type: Optional[str] = None        # texto do tipo de atividade selecionado
     selected_button: Optional[ToggleButton] = None      # referência ao ToggleButton atualmente selecionado
 
+    # Textos ligados no KV (text: root.selected_text / root.status_text)
+    selected_text: StringProperty = StringProperty("Nenhuma atividade selecionada")
+    status_text: StringProperty = StringProperty("Pronto para começar.")
+
     def __init__(self, **kwargs:Any) -> None:
         
         """
@@ -51,38 +79,56 @@ class MainScreen(Screen):
         self.current_activity_id = None     # nenhuma atividade em andamento inicialmente
         self.selected_activity_type = None  # nenhum tipo selecionado inicialmente
         self.selected_button = None         # nenhuma referência a botão selecionado
-
-        # helpers para auto-finalização (executa às 11:30 e 17:40 uma vez por dia)
-        self._auto_finalize_event = None
-        self._auto_finalize_last_date = {"11:28": None, "16:10": None}
+        self._buttons_built = False         # ToggleButtons criados uma única vez
+        self._btn_by_type: Dict[str, ToggleButton] = {}  # tipo de atividade -> ToggleButton
+        self._popups: Dict[str, Popup] = {}  # popups reutilizados por título ('Erro'/'Sucesso')
+
+        # helpers para auto-finalização (executa nos horários de AUTO_FINALIZE_TIMES)
+        self._auto_finalize_event = None   # único Clock.schedule_once pendente
+        self._auto_finalize_label = ""     # "HH:MM" do próximo disparo agendado
+        self._auto_finalize_target: Optional[datetime] = None  # instante alvo do disparo agendado
+        # executor dedicado (1 worker) para a auto-finalização: serializa disparos sobrepostos
+        self._finalize_executor: Optional[ThreadPoolExecutor] = None
+
+    def on_kv_post(self, base_widget: Any) -> None:
+        """
+        Chamado pelo Kivy após aplicar as regras do KV.
+        Guarda a instância do app e referências diretas aos widgets usados com frequência,
+        evitando a resolução via self.ids (dict + WeakProxy) a cada atualização da UI.
+        """
+        super().on_kv_post(base_widget)
+        self.app = MDApp.get_running_app()  # type: ignore[assignment]
+        ids = self.ids
+        # falhar cedo se o KV não definir algum id esperado (os métodos abaixo acessam direto, sem try/except)
+        required = ('activity_buttons', 'descricao_text', 'start_button', 'end_button',
+                    'active_box', 'active_label')
+        missing = [k for k in required if k not in ids]
+        assert not missing, missing
+        self._activity_buttons = ids.activity_buttons        # GridLayout com os ToggleButtons
+        self._descricao_text = ids.descricao_text            # campo de descrição
+        self._start_button = ids.start_button                # botão 'Iniciar'
+        self._end_button = ids.end_button                    # botão 'Finalizar'
+        self._active_box = ids.active_box                    # caixa da atividade em andamento
+        self._active_label = ids.active_label                # texto dentro da active_box
 
     def carregar_atividades(self) -> None:
         """
-        Cria os ToggleButtons dinamicamente a partir de uma lista de tipos de atividade.
+        Cria os ToggleButtons (uma única vez) a partir de ACTIVITY_TYPES.
         Registra handlers para manter estado visual persistente quando o usuário selecionar.
+        Nas chamadas seguintes apenas reseta os botões existentes para 'normal'.
         Também verifica se já existe uma atividade em andamento (para manter o estado).
         """
-         # obter a instância do app (para acessar app.user_id se preciso)
-        self.app = MDApp.get_running_app() # tipo: ignore[assignment]
-        # lista de tipos predefinidos (pode ser externalizada para config)
-        activity_types = [
-            "Pesquisa e Desenvolvimento",
-            "Atendimento de Fábrica",
-            "Documentação",
-            "Gabaritos e Dispositivos",
-            "Cadastro",
-            "Reuniões",
-            "Custos",
-            "Finame",
-            "RNC",
-            "Outros",
-        ]
-
-        activity_buttons = self.ids.activity_buttons # container (GridLayout dentro de um ScrollView)
-        activity_buttons.clear_widgets() # limpar quaisquer widgets existentes
+        activity_buttons = self._activity_buttons # container (GridLayout dentro de um ScrollView)
+
+        if self._buttons_built:
+            # botões já existem: só desmarcar (evita recriar widgets a cada entrada na tela)
+            for btn in activity_buttons.children:
+                btn.state = 'normal'
+            self.verificar_atividade_em_andamento()
+            return
 
         # Criar ToggleButtons em grupo 'activity' (apenas 1 fica 'down' ao mesmo tempo)
-        for activity_type in activity_types:
+        for activity_type in ACTIVITY_TYPES:
             # criar um toggle que mantém estado 'down' quando clicado
             btn = ToggleButton(
                 text=activity_type,  # texto exibido no botão
@@ -93,15 +139,20 @@ class MainScreen(Screen):
                 allow_no_selection=False # não permite que nenhum fique selecionado se clicar novamente
             )
             # quando o estado muda, atualiza a seleção
-            # ligar o evento de mudança de estado (state) ao método on_activity_toggled
-            # usa lambda com parâmetro default para capturar activity_type corretamente
-            btn.bind(state=lambda inst, st, at=activity_type: self.on_activity_toggled(inst, st, at))
+            # fbind passa activity_type como argumento posicional, sem criar um lambda por botão
+            btn.fbind('state', self._on_state_change, activity_type)
+            self._btn_by_type[activity_type] = btn
             # adicionar o botão ao container
             activity_buttons.add_widget(btn)
+        self._buttons_built = True
 
         # depois de criar botões, verificar se há atividade já em andamento
         self.verificar_atividade_em_andamento()
 
+    def _on_state_change(self, activity_type: str, inst: ToggleButton, value: str) -> None:
+        """Handler único ligado via fbind: repassa para on_activity_toggled."""
+        self.on_activity_toggled(inst, value, activity_type)
+
     def on_activity_toggled(self, inst: ToggleButton, state: str, activity_type: str) -> None:
         """
         Handler chamado quando o estado de um ToggleButton muda.
@@ -114,128 +165,147 @@ class MainScreen(Screen):
               # grava referência ao botão selecionado e ao tipo selecionado
             self.selected_button = inst
             self.selected_activity_type = activity_type
-            # tenta mudar a cor do botão para cor de selecionado
-            try:
+            # muda a cor do botão para cor de selecionado (se ainda não estiver)
+            if tuple(inst.background_color) != SELECTED_COLOR:
                 inst.background_color = SELECTED_COLOR
-            except Exception:
-                # se por algum motivo não puder setar cor, falha silenciosa
-                pass
             # atualizar label de seleção (na interface) para mostrar qual foi escolhido
-            try:
-                self.ids.selected_activity_label.text = f"Selecionado: {activity_type}"
-            except Exception:
-                # se o id não existir ou outro problema, ignora
-                pass
+            self.selected_text = f"Selecionado: {activity_type}"
         else:
-            # estado voltou a 'normal' (desselecionado) -> restaurar cor
-            try:
+            # estado voltou a 'normal' (desselecionado) -> restaurar cor (se necessário)
+            if tuple(inst.background_color) != NORMAL_COLOR:
                 inst.background_color = NORMAL_COLOR
-            except Exception:
-                pass
             # se o botão liberado era o que estava registrado como selecionado,
             # então limpamos a seleção registrada
             if self.selected_button is inst:
                 self.selected_button = None
                 self.selected_activity_type = None
-                try:
-                    # atualizar label para indicar que nada está selecionado
-                    self.ids.selected_activity_label.text = "Nenhuma atividade selecionada"
-                except Exception:
-                    pass
+                # atualizar label para indicar que nada está selecionado
+                self.selected_text = "Nenhuma atividade selecionada"
+
+    def _submit_db(self, callback: Callable[[Future], None], fn: Callable[..., Any], *args: Any,
+                   executor: Optional[ThreadPoolExecutor] = None) -> None:
+        """
+        Executa fn(*args) (chamada ao Supabase) no executor do app (ou no `executor` informado),
+        fora da thread da UI. Quando terminar, callback(future) é chamado na thread principal via Clock.
+        """
+        future = (executor or self.app.executor).submit(fn, *args)
+        future.add_done_callback(lambda fut: Clock.schedule_once(lambda _dt: callback(fut), 0))
 
     def acao_iniciar(self) -> None:
         """
         Ação disparada pelo botão 'Iniciar'.
         - Verifica se existe um tipo selecionado.
         - Lê o texto de descrição (se houver).
-        - Chama handle_db.iniciar_nova_atividade para registrar no Supabase.
-        - Atualiza UI (status label, caixa de atividade ativa, botões).
+        - Chama handle_db.iniciar_nova_atividade (em background) para registrar no Supabase.
+        - Atualiza UI em _on_started (status label, caixa de atividade ativa, botões).
         """
         # garantir que o usuário selecionou um tipo
         if not self.selected_activity_type:
             self.show_error("Por favor, selecione um tipo de atividade.")
             return
-        # ler descrição (se existir campo no KV)
-        descricao: str = ""
-        try:
-            descricao = self.ids.descricao_text.text
-        except Exception:
-            # se id não existir, manter string vazia
-            pass
+        # ler descrição
+        descricao: str = self._descricao_text.text
+
+        # evitar cliques repetidos enquanto a requisição está em andamento
+        self._start_button.disabled = True
+        tipo: str = self.selected_activity_type
+        # iniciar atividade no DB; app.user_id fornece o usuário atual
+        self._submit_db(
+            lambda fut: self._on_started(fut, tipo),
+            db.iniciar_nova_atividade, tipo, descricao, self.app.user_id
+        )
 
+    def _on_started(self, future: Future, tipo: str) -> None:
+        """
+        Conclusão de acao_iniciar na thread da UI.
+        """
         try:
-            # iniciar atividade no DB; get_running_app().user_id fornece o usuário atual
-            self.current_activity_id = db.iniciar_nova_atividade(
-                self.selected_activity_type, descricao, MDApp.get_running_app().user_id
-            )
-            # atualizar label de status para mostrar atividade em andamento
-            try:
-                self.ids.status_label.text = f"Em andamento: {self.selected_activity_type}"
-            except Exception:
-                pass
-            # mostrar a caixa que indica atividade ativa e ajustar estado dos controles
-            self._show_active_box(self.selected_activity_type)
-            self._set_state_em_andamento(True)
+            self.current_activity_id = future.result()
         except Exception as e:
             # se ocorrer erro ao iniciar no DB, mostrar popup de erro
+            self._start_button.disabled = False
             self.show_error(f"Falha ao iniciar atividade:\n{e}")
+            return
+        # atualizar label de status para mostrar atividade em andamento
+        self.status_text = f"Em andamento: {tipo}"
+        # mostrar a caixa que indica atividade ativa e ajustar estado dos controles
+        self._show_active_box(tipo)
+        self._set_state_em_andamento(True)
 
     def acao_finalizar(self) -> None:
         """
         Ação disparada pelo botão 'Finalizar'.
         - Verifica se há atividade em andamento (current_activity_id).
-        - Chama handle_db.finalizar_atividade para marcar fim e calcular horas.
-        - Atualiza a interface, limpa seleção e esconde a caixa de atividade.
+        - Chama handle_db.finalizar_atividade (em background) para marcar fim e calcular horas.
+        - Em _on_finalized, atualiza a interface, limpa seleção e esconde a caixa de atividade.
         """
         # se não há atividade em andamento, mostrar erro
         if not self.current_activity_id:
             self.show_error("Não há atividade em andamento para finalizar.")
             return
 
-        try:
-            # pedir ao módulo DB para finalizar a atividade corrente
-            db.finalizar_atividade(self.current_activity_id)
-            # mostrar popup de sucesso
-            self.show_success("Atividade finalizada com sucesso.")
-            # resetar id e estado local
-            self.current_activity_id = None
-
-            # limpar seleção visual: define estado do botão selecionado para 'normal'
-            if self.selected_button:
-                try:
-                    # setar state para 'normal' dispara on_activity_toggled, que reverte cor
-                    self.selected_button.state = 'normal'   
-                    self.selected_button = None
-                except Exception:
-                    pass
-             # resetar atributos locais
-            self.selected_activity_type = None
-            try:
-                self.ids.selected_activity_label.text = "Nenhuma atividade selecionada"
-                self.ids.descricao_text.text = ""
-                self.ids.status_label.text = "Pronto para começar."
-            except Exception:
-                pass
+        # evitar cliques repetidos enquanto a requisição está em andamento
+        self._end_button.disabled = True
+        # pedir ao módulo DB para finalizar a atividade corrente
+        self._submit_db(self._on_finalized, db.finalizar_atividade, self.current_activity_id)
 
-            # esconder a caixa que indica atividade em andamento e ajustar controles
-            self._show_active_box(None)
-            self._set_state_em_andamento(False)
+    def _on_finalized(self, future: Future) -> None:
+        """
+        Conclusão de acao_finalizar na thread da UI.
+        """
+        try:
+            future.result()
         except Exception as e:
             # erro ao finalizar: exibir mensagem
+            self._end_button.disabled = False
             self.show_error(f"Falha ao finalizar atividade:\n{e}")
+            return
+
+        # mostrar popup de sucesso
+        self.show_success("Atividade finalizada com sucesso.")
+        self._reset_to_idle()
+
+    def _reset_to_idle(self) -> None:
+        """
+        Volta a tela ao estado 'pronto' após uma finalização (manual ou automática):
+        limpa id/seleção, reseta os textos e esconde a caixa de atividade em andamento.
+        """
+        # resetar id e estado local
+        self.current_activity_id = None
+
+        # limpar seleção visual: define estado do botão selecionado para 'normal'
+        if self.selected_button:
+            # setar state para 'normal' dispara on_activity_toggled, que reverte cor
+            self.selected_button.state = 'normal'
+            self.selected_button = None
+        # resetar atributos locais
+        self.selected_activity_type = None
+        self.selected_text = "Nenhuma atividade selecionada"
+        self._descricao_text.text = ""
+        self.status_text = "Pronto para começar."
+
+        # esconder a caixa que indica atividade em andamento e ajustar controles
+        self._show_active_box(None)
+        self._set_state_em_andamento(False)
 
     def verificar_atividade_em_andamento(self) -> None:
         """
-        Verifica no banco se existe uma atividade sem fim (em andamento) para o usuário atual.
+        Verifica no banco (em background) se existe uma atividade sem fim (em andamento)
+        para o usuário atual. O resultado é aplicado à UI em _on_em_andamento_loaded.
+        """
+        # pegar user_id do app e chamar função do módulo DB que retorna a última atividade em andamento (ou None)
+        user_id: Optional[str] = self.app.user_id
+        self._submit_db(self._on_em_andamento_loaded, db.buscar_atividade_em_andamento, user_id)
+
+    def _on_em_andamento_loaded(self, future: Future) -> None:
+        """
+        Conclusão de verificar_atividade_em_andamento na thread da UI.
         - Se encontrar, atualiza a UI marcando o botão correspondente como 'down'
           e exibindo a caixa de atividade em andamento.
         - Se não encontrar, garante que os controles estejam no estado 'pronto'.
         """
         try:
-            # pegar user_id do app
-            user_id: Optional[str] = MDApp.get_running_app().user_id
-            # chamar função do módulo DB que retorna a última atividade em andamento (ou None)
-            row: Optional[Dict[str, Any]] = db.buscar_atividade_em_andamento(user_id)
+            row: Optional[Dict[str, Any]] = future.result()
             if row:
                 # existe atividade em andamento -> ajustar UI
                 self.current_activity_id = row.get("id") # id do registro
@@ -243,19 +313,15 @@ class MainScreen(Screen):
                 self.selected_activity_type = tipo
 
                 # tenta marcar o ToggleButton correspondente como 'down'
-                for btn in list(self.ids.activity_buttons.children):
-                    # comparar texto do botão com o tipo vindo do DB
-                    if getattr(btn, 'text', None) == tipo:
-                        btn.state = 'down'      # dispara on_activity_toggled -> atualiza cor e label
-                        self.selected_button = btn
-                    else:
-                        # opcional: deixar os outros habilitados mas não selecionados
-                        pass
+                btn = self._btn_by_type.get(tipo)
+                if btn:
+                    btn.state = 'down'      # dispara on_activity_toggled -> atualiza cor e label
+                    self.selected_button = btn
 
                 # atualizar texto/descrição/status na UI com dados retornados
-                self.ids.selected_activity_label.text = f"Continuando: {tipo}"
-                self.ids.descricao_text.text = row.get("descricao") or ""
-                self.ids.status_label.text = f"Continuando: {tipo}"
+                self.selected_text = f"Continuando: {tipo}"
+                self._descricao_text.text = row.get("descricao") or ""
+                self.status_text = f"Continuando: {tipo}"
                 # mostrar caixa de atividade ativ
                 self._show_active_box(tipo)
                 # ajustar estados dos botões (iniciar/desligar) conforme em andamento
@@ -273,22 +339,20 @@ class MainScreen(Screen):
         Ajusta habilitação/desabilitação dos controles da UI dependendo se
         há uma atividade em andamento (em_andamento=True) ou não.
         """
-        try:
-            # habilita/desabilita os botões iniciar/finalizar e o campo de descrição
-            self.ids.start_button.disabled = em_andamento
-            self.ids.end_button.disabled = not em_andamento
-            self.ids.descricao_text.disabled = em_andamento
-        except Exception:
-             # se algum id não existir, apenas ignorar (robustez)
-            pass
+        # habilita/desabilita os botões iniciar/finalizar e o campo de descrição
+        self._start_button.disabled = em_andamento
+        self._end_button.disabled = not em_andamento
+        self._descricao_text.disabled = em_andamento
 
         # Opcional: desabilitar todos os botões de atividade exceto o selecionado
-        for btn in list(self.ids.activity_buttons.children):
-            try:
-                # se preferir evitar troca de seleção enquanto atividade em andamento:
-                btn.disabled = em_andamento and (btn is not self.selected_button)
-            except Exception:
-                pass
+        # (só escreve quando o valor muda: cada atribuição dispara o dispatch da property no Kivy)
+        children = self._activity_buttons.children
+        selected = self.selected_button
+        for btn in children:
+            # se preferir evitar troca de seleção enquanto atividade em andamento:
+            desired = em_andamento and (btn is not selected)
+            if btn.disabled != desired:
+                btn.disabled = desired
 
     def _show_active_box(self, tipo_atividade_or_none: Optional[str]) -> None:
         """
@@ -296,43 +360,52 @@ class MainScreen(Screen):
         - Se for passado um tipo (string), a caixa aparece com o texto apropriado.
         - Se for passado None, a caixa é escondida.
         """
-        try:
-            if tipo_atividade_or_none:
-                # mostrar e preencher texto
-                self.ids.active_box.height = 48
-                self.ids.active_box.opacity = 1
-                self.ids.active_label.text = f"Atividade em andamento: {tipo_atividade_or_none}"
-            else:
-                 # esconder
-                self.ids.active_box.height = 0
-                self.ids.active_box.opacity = 0
-                self.ids.active_label.text = ""
-        except Exception:
-            # falha silenciosa para robustez caso ids não existam
-            pass
+        if tipo_atividade_or_none:
+            # mostrar e preencher texto
+            self._active_box.height = 48
+            self._active_box.opacity = 1
+            self._active_label.text = f"Atividade em andamento: {tipo_atividade_or_none}"
+        else:
+            # esconder
+            self._active_box.height = 0
+            self._active_box.opacity = 0
+            self._active_label.text = ""
+
+    def _get_popup(self, title: str) -> Popup:
+        """
+        Retorna o Popup (com Label em popup._label) associado ao título,
+        criando-o apenas na primeira chamada e reutilizando nas seguintes.
+        """
+        popup = self._popups.get(title)
+        if popup is None:
+            label = Label()
+            popup = Popup(title=title, content=label, size_hint=(0.8, 0.4))
+            popup._label = label
+            self._popups[title] = popup
+        return popup
 
     def show_error(self, message: str) -> None:
         """
         Mostra um popup de erro com a mensagem fornecida.
         """
-        # cria Popup com título 'Erro' e conteúdo Label com a mensagem
-        popup = Popup(title='Erro', content=Label(text=message), size_hint=(0.8, 0.4))
+        popup = self._get_popup('Erro')
+        popup._label.text = message
         popup.open() # abre o popup na tela
 
     def show_success(self, message: str) -> None:
         """
         Mostra um popup de sucesso com a mensagem fornecida.
         """
-        popup = Popup(title='Sucesso', content=Label(text=message), size_hint=(0.8, 0.4))
+        popup = self._get_popup('Sucesso')
+        popup._label.text = message
         popup.open()
 
     def logout(self) -> None:
         """
         Realiza logout: limpa app.user_id e volta para a tela de login.
         """
-        app = MDApp.get_running_app() # pega a instância corrente do app
-        app.user_id = ""              # limpa identificador do usuário logado
-        app.sm.current = 'login'      # troca a tela para o login
+        self.app.user_id = ""           # limpa identificador do usuário logado
+        self.app.sm.current = 'login'   # troca a tela para o login
 
 
     # -------------------------
@@ -357,17 +430,31 @@ class MainScreen(Screen):
         except Exception:
             pass
 
-    def start_auto_finalizer(self) -> None:
-        """
-        Inicia um Clock que verifica os horários a cada 30 segundos.
-        """
+    def start_auto_finalizer(
+        self,
+        after: Optional[datetime] = None,
+        _now: Callable[..., datetime] = datetime.now,
+        _tz: Any = db.TIMEZONE,
+    ) -> None:
+        """
+        Agenda um único disparo (Clock.schedule_once) para o próximo horário alvo.
+        Após disparar, _fire_auto_finalize reagenda o seguinte passando `after` (o alvo
+        que acabou de disparar): o próximo alvo é sempre estritamente posterior a ele,
+        mesmo que o Clock tenha disparado alguns milissegundos antes do horário.
+        `_now` e `_tz` são ligados na definição (variáveis locais em vez de lookups globais a cada chamada).
+        """
+        if self._finalize_executor is None:
+            self._finalize_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autofinalize')
         if self._auto_finalize_event is None:
-            # checar a cada 30s (pode ajustar para 60s se preferir)
-            self._auto_finalize_event = Clock.schedule_interval(self._auto_finalize_check, 30)
+            now = _now(_tz)  # usa TIMEZONE definido em handle_db.py
+            delay, label, target = self._next_target_delay(now, now if after is None else max(now, after))
+            self._auto_finalize_label = label
+            self._auto_finalize_target = target
+            self._auto_finalize_event = Clock.schedule_once(self._fire_auto_finalize, delay)
 
     def stop_auto_finalizer(self) -> None:
         """
-        Cancela o Clock de checagem.
+        Cancela o disparo agendado e encerra o executor da auto-finalização.
         """
         if self._auto_finalize_event is not None:
             try:
@@ -375,72 +462,76 @@ class MainScreen(Screen):
             except Exception:
                 pass
             self._auto_finalize_event = None
+        self._auto_finalize_target = None
+        if self._finalize_executor is not None:
+            # não bloqueia: uma finalização já enviada ainda termina em background
+            self._finalize_executor.shutdown(wait=False)
+            self._finalize_executor = None
+
+    def _next_target_delay(
+        self,
+        now: datetime,
+        after: Optional[datetime] = None,
+        _targets: Tuple[Tuple[int, int], ...] = AUTO_FINALIZE_TIMES,
+        _labels: Dict[Tuple[int, int], str] = AUTO_FINALIZE_LABELS,
+        _one_day: timedelta = timedelta(days=1),
+    ) -> Tuple[float, str, datetime]:
+        """
+        Retorna (segundos desde `now` até o próximo horário de AUTO_FINALIZE_TIMES,
+        "HH:MM" desse horário, o próprio horário alvo).
+        O alvo é o primeiro estritamente posterior a `after` (padrão: `now`);
+        horários que já passaram hoje são considerados para amanhã.
+        """
+        if after is None:
+            after = now
+        best: Optional[datetime] = None
+        best_hm: Tuple[int, int] = _targets[0]
+        for hm in _targets:
+            target = after.replace(hour=hm[0], minute=hm[1], second=0, microsecond=0)
+            if target <= after:
+                target += _one_day
+            if best is None or target < best:
+                best, best_hm = target, hm
+        return max(0.0, (best - now).total_seconds()), _labels[best_hm], best
+
+    def _fire_auto_finalize(self, dt) -> None:
+        """
+        Executado pelo Clock no horário alvo. Se houver atividade em andamento,
+        finaliza-a em background; em seguida agenda o próximo horário.
+        """
+        self._auto_finalize_event = None
+        hhmm = self._auto_finalize_label
+        fired = self._auto_finalize_target
+        try:
+            # se existe atividade em andamento, finalize-a no executor dedicado (não trava a UI)
+            if self.current_activity_id:
+                self._submit_db(
+                    lambda fut: self._on_auto_finalized(fut, hhmm),
+                    db.finalizar_atividade, self.current_activity_id,
+                    executor=self._finalize_executor,
+                )
+        except Exception as e:
+            # prevenir que exceções impeçam o reagendamento
+            print("Erro no auto-finalizador:", e)
+        # encadear o próximo disparo (estritamente após o alvo que acabou de disparar)
+        self.start_auto_finalizer(after=fired)
 
-    def _auto_finalize_check(self, dt) -> None:
+    def _on_auto_finalized(self, future: Future, time_str: str) -> None:
         """
-        Executado periodicamente pelo Clock. Se o horário for 11:30 ou 17:40
-        e ainda não rodou hoje, tenta finalizar a atividade em andamento.
+        Conclusão da finalização automática na thread da UI.
         """
         try:
-            now = datetime.now(db.TIMEZONE)  # usa TIMEZONE definido em handle_db.py
-            hhmm = now.strftime("%H:%M")
-            today = now.date()
-            targets = ("11:28", "16:10")
-
-            # Se for um horário alvo e ainda não foi executado hoje
-            if hhmm in targets and self._auto_finalize_last_date.get(hhmm) != today:
-                # marcar como executado hoje (independente se há atividade) para evitar repetições
-                self._auto_finalize_last_date[hhmm] = today
-
-                # se existe atividade em andamento, finalize-a (em thread para não travar UI)
-                if self.current_activity_id:
-                    activity_id = self.current_activity_id
-
-                    def worker_finalize(act_id: int, time_str: str) -> None:
-                        try:
-                            db.finalizar_atividade(act_id)
-                        except Exception as e:
-                            # mostrar erro na UI thread
-                            Clock.schedule_once(lambda _dt: self.show_error(f"Falha ao finalizar automaticamente: {e}"), 0)
-                            return
-                        # sucesso: atualizar UI na thread principal
-                        Clock.schedule_once(lambda _dt: self._on_auto_finalized_success(time_str), 0)
-
-                    threading.Thread(target=worker_finalize, args=(activity_id, hhmm), daemon=True).start()
-                else:
-                    # não havia atividade — só registramos a execução (já feito acima)
-                    pass
+            future.result()
         except Exception as e:
-            # prevenir que exceções atrapalhem o Clock
-            print("Erro no auto-finalizador:", e)
+            self.show_error(f"Falha ao finalizar automaticamente: {e}")
+            return
+        self._on_auto_finalized_success(time_str)
 
     def _on_auto_finalized_success(self, time_str: str) -> None:
         """
         Chamado na UI thread após a finalização automática ser bem sucedida.
         Atualiza o estado local e a interface.
         """
-        try:
-            self.show_success(f"Atividade finalizada automaticamente às {time_str}.")
-        except Exception:
-            pass
-
+        self.show_success(f"Atividade finalizada automaticamente às {time_str}.")
         # resetar estado local equivalente ao que faz acao_finalizar()
-        try:
-            self.current_activity_id = None
-            if self.selected_button:
-                try:
-                    self.selected_button.state = 'normal'
-                    self.selected_button = None
-                except Exception:
-                    pass
-            self.selected_activity_type = None
-            try:
-                self.ids.selected_activity_label.text = "Nenhuma atividade selecionada"
-                self.ids.descricao_text.text = ""
-                self.ids.status_label.text = "Pronto para começar."
-            except Exception:
-                pass
-            self._show_active_box(None)
-            self._set_state_em_andamento(False)
-        except Exception as e:
-            print("Erro ao atualizar UI após auto-finalização:", e)
+        self._reset_to_idle()
@@ -1,8 +1,24 @@
 # functions.py
 import sys
 import os
-from kivy.resources import resource_add_path
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from kivy.resources import resource_add_path, resource_find
+from dotenv import dotenv_values
+
+# Caminhos resolvidos uma única vez na importação do módulo
+_MEIPASS = getattr(sys, '_MEIPASS', None)  # pasta temporária do PyInstaller (onefile) ou None
+# pasta do executável (quando empacotado) ou cwd em dev
+_EXE_DIR = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.abspath(os.getcwd())
+_EXT_ENV_PATH = os.path.join(_EXE_DIR, ".env")  # .env externo (ao lado do exe)
+_BUNDLED_ENV_PATH = os.path.join(_MEIPASS, ".env") if _MEIPASS else None  # .env embutido
+
+def _aplicar_env(path: str) -> None:
+
+    '''Lê o .env de uma vez com dotenv_values e aplica em os.environ com um único update.
+    Assim como load_dotenv (override=False), não sobrescreve variáveis já definidas no sistema.'''
+
+    env = dotenv_values(path)
+    os.environ.update({k: v for k, v in env.items() if v is not None and k not in os.environ})
 
 def adicionar_caminhos_kv() -> None:
 
@@ -12,8 +28,8 @@ def adicionar_caminhos_kv() -> None:
     Assim, mesmo empacotado em um único executável, o app ainda consegue encontrar e carregar corretamente seus layouts e imagens.'''
 
     # Se executável onefile extrair arquivos, adiciona o caminho de recursos para Kivy
-    if getattr(sys, '_MEIPASS', None):
-        resource_add_path(os.path.join(sys._MEIPASS))
+    if _MEIPASS:
+        resource_add_path(_MEIPASS)
 
 def carregar_env() -> None:
 
@@ -26,24 +42,15 @@ def carregar_env() -> None:
       2) .env embutido extraído em sys._MEIPASS (quando onefile)
       3) variáveis do sistema (os.environ)'''
     
-    # 1) pasta do executável (quando empacotado) ou cwd em dev
-    if getattr(sys, "frozen", False):
-        exe_dir = os.path.dirname(sys.executable)
-    else:
-        exe_dir = os.path.abspath(os.getcwd())
-
-    external_env = os.path.join(exe_dir, ".env")
-    if os.path.exists(external_env):
-        load_dotenv(external_env)
+    # 1) .env externo (pasta do executável ou cwd em dev)
+    if os.path.exists(_EXT_ENV_PATH):
+        _aplicar_env(_EXT_ENV_PATH)
         return
 
     # 2) .env embutido extraído em _MEIPASS (onefile)
-    base = getattr(sys, "_MEIPASS", None)
-    if base:
-        bundled_env = os.path.join(base, ".env")
-        if os.path.exists(bundled_env):
-            load_dotenv(bundled_env)
-            return
+    if _BUNDLED_ENV_PATH and os.path.exists(_BUNDLED_ENV_PATH):
+        _aplicar_env(_BUNDLED_ENV_PATH)
+        return
 
     # 3) se nada encontrado, não faz nada (usa variáveis do sistema, se existirem)
     return
@@ -67,9 +74,26 @@ def carregar_arquivos_kv() -> None:
      Essa função garante que eles sejam lidos e aplicados antes que as telas sejam criadas, 
      permitindo que os widgets e telas apareçam como esperado.'''
      
-    # Carregar os arquivos KV (devem estar na mesma pasta do exe / ou embutidos)
-    Builder.load_file('kv/login.kv')
-    Builder.load_file('kv/main.kv')
+    # No executável, preferir o KV embutido como string (gerado por src/gerar_kv_strings.py
+    # no passo do PyInstaller): evita localizar/ler os arquivos em sys._MEIPASS.
+    # Em desenvolvimento os .kv são sempre lidos do disco, para que uma edição não
+    # seja mascarada por um _kv_strings.py desatualizado.
+    textos = None
+    if getattr(sys, 'frozen', False):
+        try:
+            from src._kv_strings import LOGIN_KV, MAIN_KV
+            textos = [LOGIN_KV, MAIN_KV]
+        except ImportError:
+            pass
+    if textos is None:
+        # Ler os arquivos KV (devem estar na mesma pasta do exe / ou embutidos);
+        # resource_find resolve o caminho também dentro de sys._MEIPASS
+        textos = []
+        for nome in ('kv/login.kv', 'kv/main.kv'):
+            with open(resource_find(nome) or nome, encoding='utf-8') as f:
+                textos.append(f.read())
+    # Um único load_string com os dois layouts: uma só passada do parser e das regras do Builder
+    Builder.load_string('\n'.join(textos))
 
 class ActivityTrackerApp(MDApp):
 
@@ -78,12 +102,13 @@ class ActivityTrackerApp(MDApp):
     1) Define uma propriedade user_id que pode ser usada em várias partes do app para identificar o usuário logado.
     2) Configura o tema (cores, estilo claro/escuro).
     3) Cria um ScreenManager, que permite alternar entre diferentes telas.
-    4) Adiciona duas telas principais: a de login (LoginScreen) e a de atividades (MainScreen).
+    4) Adiciona a tela de login (LoginScreen); a de atividades (MainScreen) é criada sob demanda em ensure_main_screen().
 
     Quando chamamos .run(), essa classe inicializa o aplicativo, carrega o layout e mantém a interface funcionando até o usuário fechar.'''
 
     user_id: StringProperty = StringProperty("")
     sm: ScreenManager  # Type annotation para o screen manager
+    executor: ThreadPoolExecutor  # pool para chamadas ao Supabase fora da thread da UI
 
     def build(self) -> ScreenManager:
 
@@ -92,8 +117,28 @@ class ActivityTrackerApp(MDApp):
         self.theme_cls.theme_style = "Light" # Alterna entre tema claro e escuro
         self.theme_cls.material_style = "M3"  # Material Design 3 (mais moderno)
 
+        # Pool de threads para as chamadas ao banco (a UI não trava durante a requisição HTTP)
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='db')
+
         # Gerenciador de Telas: 
         self.sm = ScreenManager()
         self.sm.add_widget(LoginScreen(name='login'))
-        self.sm.add_widget(MainScreen(name='main'))
-        return self.sm
\ No newline at end of file
+        # MainScreen só é criada após o login (ver ensure_main_screen)
+        return self.sm
+
+    def ensure_main_screen(self) -> MainScreen:
+
+        '''Cria e adiciona a MainScreen ao ScreenManager na primeira vez que for necessária (após o login bem sucedido).
+        Assim a inicialização do app não paga o custo de criar a tela principal para quem nunca chega a logar.'''
+
+        if 'main' not in self.sm.screen_names:
+            self.sm.add_widget(MainScreen(name='main'))
+        return self.sm.get_screen('main')
+
+    def on_stop(self) -> None:
+
+        '''Chamado pelo Kivy ao encerrar o app: libera o pool de threads do banco sem bloquear o fechamento da janela.'''
+
+        executor = getattr(self, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,43 @@
+# src/gerar_kv_strings.py
+"""
+Gera src/_kv_strings.py com o conteúdo dos arquivos .kv embutido como constantes.
+
+Executar imediatamente antes de empacotar com o PyInstaller:
+
+    python -m src.gerar_kv_strings
+
+No executável (sys.frozen), carregar_arquivos_kv() usa o módulo gerado e não
+precisa abrir os .kv (nem localizá-los em sys._MEIPASS). Fora do executável os
+.kv são sempre lidos do disco, então o módulo não precisa ser regenerado a cada
+edição durante o desenvolvimento.
+"""
+import os
+
+# arquivo .kv -> nome da constante gerada
+KV_FILES = {
+    "login.kv": "LOGIN_KV",
+    "main.kv": "MAIN_KV",
+}
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KV_DIR = os.path.join(ROOT_DIR, "kv")
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_kv_strings.py")
+
+
+def gerar() -> str:
+    """Lê os .kv de KV_DIR e escreve OUTPUT_PATH. Retorna o caminho gerado."""
+    linhas = [
+        "# Arquivo gerado por src/gerar_kv_strings.py — não editar manualmente.",
+        "",
+    ]
+    for nome, constante in KV_FILES.items():
+        with open(os.path.join(KV_DIR, nome), encoding="utf-8") as f:
+            linhas.append(f"{constante} = {f.read()!r}")
+            linhas.append("")
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas))
+    return OUTPUT_PATH
+
+
+if __name__ == "__main__":
+    print("Gerado:", gerar())
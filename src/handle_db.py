@@ -15,26 +15,33 @@ carregadas antes de chamar funções deste módulo.
 """
 
 import os
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import logging
-import pytz
-from typing import Optional
+from zoneinfo import ZoneInfo
+from typing import Optional, Any, Dict, List, Tuple
 
-# Tenta importar a biblioteca oficial do Supabase
+# Tenta importar a biblioteca oficial do Supabase (httpx e postgrest vêm como dependências dela)
 try:
-    from supabase import create_client, Client
+    import httpx
+    from supabase import create_client, Client, ClientOptions
+    from postgrest import APIError, ReturnMethod
 except Exception as e:
     raise ImportError("Biblioteca 'supabase' não encontrada. Instale com: pip install supabase") from e
 
-# Configuração de logging simples (não altera lógica; útil para diagnóstico)
-logging.basicConfig(level=logging.INFO)
+# Logger do módulo; handlers/nível ficam a cargo da aplicação (sem basicConfig na importação)
 logger = logging.getLogger(__name__)
 
 # Nome da tabela no Supabase
 TABLE_NAME: str = "atividades"
 
 # Definindo fuso horário padrão (America/Sao_Paulo)
-TIMEZONE = pytz.timezone('America/Sao_Paulo')
+TIMEZONE = ZoneInfo('America/Sao_Paulo')  # no Windows os dados de fuso vêm do pacote tzdata
+
+# Colunas retornadas por listar_atividades (evita SELECT *)
+LISTAR_COLUMNS: str = "id, tipo_atividade, descricao, inicio, fim, horas_trabalhadas, user_id"
 
 # SQL para criar tabela caso não exista (referência)
 CREATE_TABLE_SQL: str = f"""
@@ -45,27 +52,179 @@ CREATE TABLE IF NOT EXISTS public.{TABLE_NAME} (
   inicio timestamp without time zone NOT NULL,
   fim timestamp without time zone,
   user_id text,
-  ano integer,
-  mes integer,
-  dia integer,
+  ano integer GENERATED ALWAYS AS (EXTRACT(YEAR FROM inicio)::int) STORED,
+  mes integer GENERATED ALWAYS AS (EXTRACT(MONTH FROM inicio)::int) STORED,
+  dia integer GENERATED ALWAYS AS (EXTRACT(DAY FROM inicio)::int) STORED,
   horas_trabalhadas numeric
 );
+
+-- atividades em andamento (fim IS NULL) por usuário, mais recente primeiro
+CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_open
+  ON public.{TABLE_NAME} (user_id, id DESC) WHERE fim IS NULL;
+
+-- listagens por usuário ordenadas por início
+CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_user_inicio
+  ON public.{TABLE_NAME} (user_id, inicio DESC);
 """
 
+# Máximo de finalizações simultâneas no fallback por id (bem abaixo do limite de conexões do Supabase)
+FINALIZE_MAX_WORKERS: int = 8
+
+# Migração de tabelas antigas: ano/mes/dia passam a ser colunas geradas a partir de 'inicio'
+# (o Postgres não converte coluna comum em gerada; é preciso recriá-las)
+GENERATED_DATE_COLUMNS_SQL: str = f"""
+ALTER TABLE public.{TABLE_NAME}
+  DROP COLUMN IF EXISTS ano,
+  DROP COLUMN IF EXISTS mes,
+  DROP COLUMN IF EXISTS dia;
+ALTER TABLE public.{TABLE_NAME}
+  ADD COLUMN ano integer GENERATED ALWAYS AS (EXTRACT(YEAR FROM inicio)::int) STORED,
+  ADD COLUMN mes integer GENERATED ALWAYS AS (EXTRACT(MONTH FROM inicio)::int) STORED,
+  ADD COLUMN dia integer GENERATED ALWAYS AS (EXTRACT(DAY FROM inicio)::int) STORED,
+  ADD COLUMN IF NOT EXISTS horas_trabalhadas numeric;
+"""
+
+# Função (RPC) que finaliza em lote, no servidor, todas as atividades sem 'fim'.
+# Deve ser criada uma vez no SQL Editor do Supabase (referência, como CREATE_TABLE_SQL).
+# 'inicio'/'fim' são timestamp sem fuso gravados no horário de America/Sao_Paulo.
+FINALIZE_OPEN_ACTIVITIES_RPC: str = "finalize_open_activities"
+FINALIZE_OPEN_ACTIVITIES_SQL: str = f"""
+CREATE OR REPLACE FUNCTION public.{FINALIZE_OPEN_ACTIVITIES_RPC}(p_user_id text DEFAULT NULL)
+RETURNS SETOF bigint
+LANGUAGE sql
+AS $$
+  -- trava só as linhas em aberto (índice parcial fim IS NULL) e pula as já travadas
+  -- por outra instância encerrando ao mesmo tempo: a transação fica curta e sem espera
+  UPDATE public.{TABLE_NAME} AS a
+     SET fim = now() AT TIME ZONE 'America/Sao_Paulo',
+         horas_trabalhadas = round(
+           (EXTRACT(EPOCH FROM ((now() AT TIME ZONE 'America/Sao_Paulo') - a.inicio)) / 3600)::numeric, 10)
+   WHERE a.id IN (
+           SELECT id FROM public.{TABLE_NAME}
+            WHERE fim IS NULL
+              AND (p_user_id IS NULL OR user_id = p_user_id)
+              FOR UPDATE SKIP LOCKED
+         )
+  RETURNING a.id;
+$$;
+"""
+# Função (RPC) que finaliza uma atividade em uma única ida ao servidor (UPDATE ... RETURNING).
+FINALIZE_ACTIVITY_RPC: str = "finalize_activity"
+FINALIZE_ACTIVITY_SQL: str = f"""
+CREATE OR REPLACE FUNCTION public.{FINALIZE_ACTIVITY_RPC}(p_id bigint)
+RETURNS SETOF public.{TABLE_NAME}
+LANGUAGE sql
+AS $$
+  UPDATE public.{TABLE_NAME}
+     SET fim = now() AT TIME ZONE 'America/Sao_Paulo',
+         horas_trabalhadas = round(
+           (EXTRACT(EPOCH FROM ((now() AT TIME ZONE 'America/Sao_Paulo') - inicio)) / 3600)::numeric, 10)
+   WHERE id = p_id
+  RETURNING *;
+$$;
+"""
+
+
+# Conexões HTTP reutilizadas (keep-alive + HTTP/2 via pacote h2) pelo cliente Supabase
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=20, keepalive_expiry=60.0)
+HTTP_TIMEOUT: float = 120.0  # mesmo padrão do postgrest-py; com httpx_client próprio o timeout vem daqui
+# RPCs que não existem no banco (criadas à mão): detectado na primeira chamada e lembrado
+# para o resto do processo, para não gastar uma requisição a mais em toda finalização.
+# PGRST202: função não encontrada no schema cache do PostgREST; 42883: assinatura inexistente.
+_RPC_NOT_FOUND_CODES = frozenset(("PGRST202", "42883", 404, "404"))
+_rpcs_ausentes: set = set()
+_RPC_LOCK = threading.Lock()
+
+
+def _erro_rpc_ausente(e: Exception) -> bool:
+    """True se o erro do PostgREST indica que a função (RPC) não existe."""
+    return getattr(e, "code", None) in _RPC_NOT_FOUND_CODES
+
+
+def _marcar_rpc_ausente(nome: str, sql: str) -> None:
+    """Registra que a RPC não existe e loga (uma única vez) o SQL para criá-la."""
+    with _RPC_LOCK:
+        if nome in _rpcs_ausentes:
+            return
+        _rpcs_ausentes.add(nome)
+    logger.warning("RPC '%s' não existe no banco; usando o caminho sem RPC. SQL para criá-la:\n%s", nome, sql)
+
+
+# Cliente Supabase compartilhado pelo processo (criado na primeira chamada)
+_client_singleton: Optional[Client] = None
+_CLIENT_LOCK = threading.Lock()
+
 
 def get_supabase_client() -> Client:
     """
-    Cria e retorna o cliente do Supabase usando variáveis de ambiente.
+    Retorna o cliente do Supabase (criado uma única vez a partir das variáveis de ambiente).
+
+    As chamadas seguintes reutilizam a mesma instância e sua sessão httpx (keep-alive, HTTP/2);
+    a criação é protegida por lock, pois as funções deste módulo rodam em threads.
 
     Raises:
         RuntimeError: Se SUPABASE_URL ou SUPABASE_KEY não estiverem definidos.
     """
-    url: Optional[str] = os.environ.get("SUPABASE_URL")
-    key: Optional[str] = os.environ.get("SUPABASE_KEY")
-    if not url or not key:
-        raise RuntimeError("SUPABASE_URL e SUPABASE_KEY devem estar definidas como variáveis de ambiente.")
-    client: Client = create_client(url, key)
-    return client
+    global _client_singleton
+    client = _client_singleton
+    if client is not None:
+        return client
+    with _CLIENT_LOCK:
+        if _client_singleton is None:
+            url: Optional[str] = os.environ.get("SUPABASE_URL")
+            key: Optional[str] = os.environ.get("SUPABASE_KEY")
+            if not url or not key:
+                raise RuntimeError("SUPABASE_URL e SUPABASE_KEY devem estar definidas como variáveis de ambiente.")
+            # sessão httpx persistente: evita novo handshake TCP/TLS a cada requisição
+            http_client = httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, follow_redirects=True)
+            _client_singleton = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+        return _client_singleton
+
+
+# Cache em memória (TTL curto) para as leituras feitas pela UI.
+# Chave: (função, user_id, parâmetros); valor: (expira_em, resultado).
+CACHE_TTL: float = 2.0
+CACHE_MAXSIZE: int = 32
+_cache: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+_CACHE_LOCK = threading.Lock()
+_MISS = object()  # sentinela: None é um resultado válido (nenhuma atividade em andamento)
+
+
+def _cache_get(key: Tuple[Any, ...]) -> Any:
+    """Retorna o valor em cache para key (ou _MISS se ausente/expirado)."""
+    with _CACHE_LOCK:
+        item = _cache.get(key)
+        if item is None:
+            return _MISS
+        if item[0] <= time.monotonic():
+            del _cache[key]
+            return _MISS
+        return item[1]
+
+
+def _cache_put(key: Tuple[Any, ...], value: Any) -> None:
+    """Guarda value em cache por CACHE_TTL segundos (descarta entradas antigas se cheio)."""
+    with _CACHE_LOCK:
+        if len(_cache) >= CACHE_MAXSIZE:
+            agora = time.monotonic()
+            for k in [k for k, (exp, _) in _cache.items() if exp <= agora]:
+                del _cache[k]
+            if len(_cache) >= CACHE_MAXSIZE:
+                _cache.pop(next(iter(_cache)))
+        _cache[key] = (time.monotonic() + CACHE_TTL, value)
+
+
+def _invalidate(user_id: Optional[str] = None) -> None:
+    """
+    Remove do cache as leituras afetadas por uma escrita.
+    Com user_id, remove as entradas desse usuário e as sem filtro de usuário; sem user_id, limpa tudo.
+    """
+    with _CACHE_LOCK:
+        if user_id is None:
+            _cache.clear()
+            return
+        for k in [k for k in _cache if k[1] in (user_id, None)]:
+            del _cache[k]
 
 
 def setup_database() -> dict:
@@ -75,19 +234,30 @@ def setup_database() -> dict:
     """
     supabase = get_supabase_client()
     try:
-        # Testa se a tabela existe tentando buscar um id
-        resp = supabase.table(TABLE_NAME).select("id").limit(1).execute()
+        # As duas consultas são independentes: dispara em paralelo (latência ~1 ida ao servidor)
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            # Testa se a tabela existe tentando buscar um id
+            f_tabela = ex.submit(lambda: supabase.table(TABLE_NAME).select("id").limit(1).execute())
+            # Verifica colunas adicionais necessárias (apenas aviso)
+            f_colunas = ex.submit(
+                lambda: supabase.table(TABLE_NAME).select("ano, mes, dia, horas_trabalhadas").limit(1).execute()
+            )
+
+        resp = f_tabela.result()
         if getattr(resp, "error", None):
             logger.warning("Erro ao acessar tabela '%s': %s", TABLE_NAME, resp.error)
             return {"exists": False, "create_table_sql": CREATE_TABLE_SQL}
 
-        # Verifica colunas adicionais necessárias (apenas aviso)
-        check_columns = supabase.table(TABLE_NAME).select("ano, mes, dia, horas_trabalhadas").limit(1).execute()
-        if getattr(check_columns, "error", None):
+        try:
+            check_columns = f_colunas.result()
+        except Exception as e:
+            # falha na checagem de colunas não invalida a tabela (apenas aviso)
+            logger.warning("Falha ao verificar colunas de '%s': %s", TABLE_NAME, e)
+            check_columns = None
+        if check_columns is None or getattr(check_columns, "error", None):
             logger.warning(
                 "Tabela existe mas faltam colunas. Execute este SQL no Supabase:\n%s",
-                "ALTER TABLE atividades ADD COLUMN ano integer, ADD COLUMN mes integer, "
-                "ADD COLUMN dia integer, ADD COLUMN horas_trabalhadas numeric;"
+                GENERATED_DATE_COLUMNS_SQL
             )
 
         logger.info("Tabela '%s' acessível no Supabase.", TABLE_NAME)
@@ -97,6 +267,9 @@ def setup_database() -> dict:
         return {"exists": False, "create_table_sql": CREATE_TABLE_SQL}
 
 
+_UM_MICROSSEGUNDO = timedelta(microseconds=1)
+MICROS_POR_HORA: int = 3_600_000_000
+
 def calcular_horas_trabalhadas(inicio: datetime, fim: Optional[datetime]) -> Optional[float]:
     """
     Calcula o total de horas entre início e fim.
@@ -110,12 +283,59 @@ def calcular_horas_trabalhadas(inicio: datetime, fim: Optional[datetime]) -> Opt
     """
     if not fim:
         return None
-    diferenca = fim - inicio
-    horas = diferenca.total_seconds() / 3600
-    return round(horas, 10)
+    # diferença em microssegundos inteiros (exata) e uma única divisão em float
+    micros: int = (fim - inicio) // _UM_MICROSSEGUNDO
+    return round(micros / MICROS_POR_HORA, 10)
+
 
+# ano/mes/dia: enquanto a tabela não tiver rodado GENERATED_DATE_COLUMNS_SQL elas são colunas
+# comuns e precisam ser enviadas no INSERT. Quando já são geradas, o Postgres recusa valores
+# explícitos com o erro 428C9; nesse caso repetimos sem elas e lembramos para o resto do processo.
+GENERATED_COLUMN_ERROR: str = "428C9"
+_DATE_FIELDS: Tuple[str, ...] = ("ano", "mes", "dia")
+_colunas_data_geradas: bool = False
 
-def iniciar_nova_atividade(tipo: str, descricao: str, user_id: str, supabase_client: Client = None) -> Optional[int]:
+
+def _payload_atividade(tipo: str, descricao: str, user_id: str, inicio: datetime, inicio_iso: str) -> dict:
+    """
+    Monta a linha enviada no INSERT. O horário já vem formatado (inicio_iso),
+    para que inserções em lote reutilizem o mesmo valor.
+    ano/mes/dia só são enviados enquanto não se sabe que são colunas geradas.
+    """
+    payload = {
+        "tipo_atividade": tipo,
+        "descricao": descricao,
+        "inicio": inicio_iso,
+        "user_id": user_id,
+        "horas_trabalhadas": None
+    }
+    if not _colunas_data_geradas:
+        payload["ano"], payload["mes"], payload["dia"] = inicio.year, inicio.month, inicio.day
+    return payload
+
+
+def _inserir(supabase_client: Client, payload: Any, **kwargs: Any) -> Any:
+    """
+    Executa o INSERT de uma linha (dict) ou de um lote (list). Se ano/mes/dia já forem
+    colunas geradas (erro 428C9), remove esses campos, marca o fato e repete uma vez.
+    """
+    global _colunas_data_geradas
+    try:
+        return supabase_client.table(TABLE_NAME).insert(payload, **kwargs).execute()
+    except APIError as e:
+        if getattr(e, "code", None) != GENERATED_COLUMN_ERROR or _colunas_data_geradas:
+            raise
+        logger.info("ano/mes/dia são colunas geradas; deixando de enviá-las no INSERT.")
+        _colunas_data_geradas = True
+        linhas = payload if isinstance(payload, list) else [payload]
+        for linha in linhas:
+            for campo in _DATE_FIELDS:
+                linha.pop(campo, None)
+        return supabase_client.table(TABLE_NAME).insert(payload, **kwargs).execute()
+
+
+def iniciar_nova_atividade(tipo: str, descricao: str, user_id: str, supabase_client: Client = None,
+                           return_id: bool = True) -> Optional[int]:
     """
     Inicia uma nova atividade no Supabase e retorna o ID criado.
 
@@ -124,32 +344,26 @@ def iniciar_nova_atividade(tipo: str, descricao: str, user_id: str, supabase_cli
         descricao (str): Descrição da atividade.
         user_id (str): Identificador do usuário.
         supabase_client (Client, opcional): Cliente Supabase já inicializado.
+        return_id (bool): Se False, usa 'Prefer: return=minimal' (o servidor não devolve
+            a linha inserida) e a função retorna None. A tela principal usa o padrão (True).
 
     Returns:
-        int | None: ID da atividade criada ou None em caso de falha.
+        int | None: ID da atividade criada ou None em caso de falha (ou se return_id=False).
     """
     if not supabase_client:
         supabase_client = get_supabase_client()
 
-    hora_inicio = datetime.now(TIMEZONE)
-    hora_inicio_iso: str = hora_inicio.isoformat()
-    ano, mes, dia = hora_inicio.year, hora_inicio.month, hora_inicio.day
+    hora_inicio: datetime = datetime.now(TIMEZONE)
+    payload = _payload_atividade(tipo, descricao, user_id, hora_inicio, hora_inicio.isoformat())
 
-    payload = {
-        "tipo_atividade": tipo,
-        "descricao": descricao,
-        "inicio": hora_inicio_iso,
-        "user_id": user_id,
-        "ano": ano,
-        "mes": mes,
-        "dia": dia,
-        "horas_trabalhadas": None
-    }
-
-    resp = supabase_client.table(TABLE_NAME).insert(payload).execute()
+    returning = ReturnMethod.representation if return_id else ReturnMethod.minimal
+    resp = _inserir(supabase_client, payload, returning=returning)
     if getattr(resp, "error", None):
         logger.error("Erro ao inserir atividade: %s", resp.error)
         raise RuntimeError(f"Supabase insert error: {resp.error}")
+    _invalidate(user_id)
+    if not return_id:
+        return None
 
     data = getattr(resp, "data", None)
     if data and isinstance(data, list) and len(data) > 0:
@@ -158,6 +372,40 @@ def iniciar_nova_atividade(tipo: str, descricao: str, user_id: str, supabase_cli
     return None
 
 
+def iniciar_atividades_em_lote(atividades: List[Tuple[str, str, str]], supabase_client: Client = None) -> List[int]:
+    """
+    Insere várias atividades em uma única requisição (um INSERT com lista de linhas).
+
+    Args:
+        atividades (list[tuple]): Tuplas (tipo, descricao, user_id).
+        supabase_client (Client, opcional): Cliente Supabase já inicializado.
+
+    Returns:
+        list[int]: IDs criados, na ordem retornada pelo servidor.
+    """
+    if not atividades:
+        return []
+    if not supabase_client:
+        supabase_client = get_supabase_client()
+
+    # um único datetime.now + isoformat para todo o lote (fora do loop)
+    hora_inicio: datetime = datetime.now(TIMEZONE)
+    hora_inicio_iso: str = hora_inicio.isoformat()
+    payloads = [
+        _payload_atividade(tipo, descricao, user_id, hora_inicio, hora_inicio_iso)
+        for tipo, descricao, user_id in atividades
+    ]
+
+    resp = _inserir(supabase_client, payloads)
+    if getattr(resp, "error", None):
+        logger.error("Erro ao inserir lote de atividades: %s", resp.error)
+        raise RuntimeError(f"Supabase insert error: {resp.error}")
+    for user_id in {a[2] for a in atividades}:
+        _invalidate(user_id)
+
+    data = getattr(resp, "data", None) or []
+    return [row["id"] for row in data if "id" in row]
+
 def finalizar_atividade(activity_id: int, supabase_client: Client = None) -> bool:
     """
     Finaliza uma atividade no Supabase calculando horas trabalhadas.
@@ -172,6 +420,47 @@ def finalizar_atividade(activity_id: int, supabase_client: Client = None) -> boo
     if not supabase_client:
         supabase_client = get_supabase_client()
 
+    # Caminho principal: UPDATE ... RETURNING no servidor (horas calculadas em SQL).
+    # Se a RPC não existe no banco (detectado uma vez por processo), vai direto ao SELECT + UPDATE.
+    if FINALIZE_ACTIVITY_RPC in _rpcs_ausentes:
+        return _finalizar_atividade_select_update(activity_id, supabase_client)
+    try:
+        resp = supabase_client.rpc(FINALIZE_ACTIVITY_RPC, {"p_id": activity_id}).execute()
+    except APIError as e:
+        if not _erro_rpc_ausente(e):
+            raise
+        _marcar_rpc_ausente(FINALIZE_ACTIVITY_RPC, FINALIZE_ACTIVITY_SQL)
+        return _finalizar_atividade_select_update(activity_id, supabase_client)
+    if getattr(resp, "error", None):
+        logger.error("Erro ao finalizar atividade id=%s: %s", activity_id, resp.error)
+        raise RuntimeError(f"Supabase rpc error: {resp.error}")
+
+    _invalidate()  # user_id não é conhecido aqui: limpa todas as leituras em cache
+    if not getattr(resp, "data", None):
+        logger.error("Atividade id=%s não encontrada.", activity_id)
+        raise RuntimeError("Atividade não encontrada.")
+    logger.info("Atividade id=%s finalizada (horas=%s)", activity_id, resp.data[0].get("horas_trabalhadas"))
+    return True
+
+
+def _parse_inicio(inicio_str: str) -> datetime:
+    """
+    Converte o 'inicio' (string ISO vinda do Supabase) em datetime com fuso.
+    'inicio' é timestamp sem fuso gravado no horário de TIMEZONE: basta anexar o fuso
+    (sem conversão); a diferença entre datetimes com fuso não exige astimezone.
+    """
+    if inicio_str.endswith('Z'):
+        inicio_str = inicio_str[:-1] + '+00:00'
+    inicio = datetime.fromisoformat(inicio_str)
+    if inicio.tzinfo is None:
+        inicio = inicio.replace(tzinfo=TIMEZONE)
+    return inicio
+
+def _finalizar_atividade_select_update(activity_id: int, supabase_client: Client) -> bool:
+    """
+    Fallback de finalizar_atividade (quando a RPC não existe): busca o início,
+    calcula as horas em Python e atualiza o registro (duas idas ao servidor).
+    """
     # Busca atividade para obter início
     atividade = supabase_client.table(TABLE_NAME).select("inicio").eq("id", activity_id).execute()
     if getattr(atividade, "error", None):
@@ -181,9 +470,7 @@ def finalizar_atividade(activity_id: int, supabase_client: Client = None) -> boo
         logger.error("Atividade id=%s não encontrada.", activity_id)
         raise RuntimeError("Atividade não encontrada.")
 
-    # Converte string ISO para datetime e aplica timezone
-    inicio_str: str = atividade.data[0]["inicio"]
-    inicio: datetime = datetime.fromisoformat(inicio_str.replace('Z', '+00:00')).astimezone(TIMEZONE)
+    inicio: datetime = _parse_inicio(atividade.data[0]["inicio"])
 
     fim: datetime = datetime.now(TIMEZONE)
     fim_iso: str = fim.isoformat()
@@ -198,25 +485,33 @@ def finalizar_atividade(activity_id: int, supabase_client: Client = None) -> boo
     if getattr(resp, "error", None):
         logger.error("Erro ao finalizar atividade id=%s: %s", activity_id, resp.error)
         raise RuntimeError(f"Supabase update error: {resp.error}")
+    _invalidate()
     logger.info("Atividade id=%s finalizada (horas=%s)", activity_id, horas_trabalhadas)
     return True
 
 
-def buscar_atividade_em_andamento(user_id: Optional[str] = None, supabase_client: Client = None) -> Optional[dict]:
+def buscar_atividade_em_andamento(user_id: Optional[str] = None, supabase_client: Client = None,
+                                  columns: str = "id, tipo_atividade, descricao") -> Optional[dict]:
     """
     Busca a última atividade em andamento (sem horário de fim).
 
     Args:
         user_id (str | None): Usuário específico para filtro (opcional).
         supabase_client (Client, opcional): Cliente Supabase.
+        columns (str): Colunas retornadas (padrão: apenas as usadas pela tela principal).
 
     Returns:
         dict | None: Dados da atividade ou None se não houver.
     """
+    key = ("em_andamento", user_id, columns)
+    cached = _cache_get(key)
+    if cached is not _MISS:
+        return dict(cached) if cached else None
+
     if not supabase_client:
         supabase_client = get_supabase_client()
 
-    query = supabase_client.table(TABLE_NAME).select("*").is_("fim", None).order("id", desc=True).limit(1)
+    query = supabase_client.table(TABLE_NAME).select(columns).is_("fim", None).order("id", desc=True).limit(1)
     if user_id is not None:
         query = query.eq("user_id", user_id)
 
@@ -226,12 +521,13 @@ def buscar_atividade_em_andamento(user_id: Optional[str] = None, supabase_client
         raise RuntimeError(f"Supabase select error: {resp.error}")
 
     data = getattr(resp, "data", None)
-    if data and isinstance(data, list) and len(data) > 0:
-        return data[0]
-    return None
+    row: Optional[dict] = data[0] if data and isinstance(data, list) and len(data) > 0 else None
+    _cache_put(key, row)
+    return dict(row) if row else None
 
 
-def listar_atividades(limit: int = 100, user_id: Optional[str] = None, supabase_client: Client = None) -> list:
+def listar_atividades(limit: int = 100, user_id: Optional[str] = None, supabase_client: Client = None,
+                      columns: str = LISTAR_COLUMNS) -> list:
     """
     Lista atividades do Supabase, ordenadas por ID decrescente.
 
@@ -239,14 +535,20 @@ def listar_atividades(limit: int = 100, user_id: Optional[str] = None, supabase_
         limit (int): Número máximo de atividades a retornar.
         user_id (str | None): Usuário específico para filtro.
         supabase_client (Client, opcional): Cliente Supabase.
+        columns (str): Colunas retornadas (padrão: LISTAR_COLUMNS, sem ano/mes/dia).
 
     Returns:
         list[dict]: Lista de atividades.
     """
+    key = ("listar", user_id, limit, columns)
+    cached = _cache_get(key)
+    if cached is not _MISS:
+        return list(cached)
+
     if not supabase_client:
         supabase_client = get_supabase_client()
 
-    query = supabase_client.table(TABLE_NAME).select("*").order("id", desc=True).limit(limit)
+    query = supabase_client.table(TABLE_NAME).select(columns).order("id", desc=True).limit(limit)
     if user_id is not None:
         query = query.eq("user_id", user_id)
     resp = query.execute()
@@ -254,20 +556,22 @@ def listar_atividades(limit: int = 100, user_id: Optional[str] = None, supabase_
     if getattr(resp, "error", None):
         logger.error("Erro ao listar atividades: %s", resp.error)
         raise RuntimeError(f"Supabase select error: {resp.error}")
-    return getattr(resp, "data", []) or []
-
-
-import threading
+    rows: list = getattr(resp, "data", []) or []
+    _cache_put(key, rows)
+    return list(rows)
 
 
-def finalizar_atividades_em_andamento(supabase_client: Client = None) -> int:
+def finalizar_atividades_em_andamento(supabase_client: Client = None, user_id: Optional[str] = None) -> int:
     """
     Finaliza todas as atividades que estiverem sem 'fim' (fim IS NULL).
     Retorna o número de atividades finalizadas com sucesso.
 
     Observações:
     - Usa get_supabase_client() se supabase_client não for fornecido.
-    - Reutiliza finalizar_atividade(...) para garantir cálculo de horas.
+    - Caminho principal: uma única chamada à RPC FINALIZE_OPEN_ACTIVITIES_RPC
+      (UPDATE em lote no servidor, horas calculadas em SQL).
+    - Se a RPC não existir no banco (detectado uma vez por processo), usa o fallback
+      _finalizar_em_andamento_por_id; outros erros retornam 0.
     - Pode falhar se não houver rede no momento do encerramento.
     """
     if not supabase_client:
@@ -277,25 +581,90 @@ def finalizar_atividades_em_andamento(supabase_client: Client = None) -> int:
             logger.exception("Não foi possível criar Supabase client ao finalizar atividades: %s", e)
             return 0
 
+    if FINALIZE_OPEN_ACTIVITIES_RPC not in _rpcs_ausentes:
+        try:
+            resp = supabase_client.rpc(FINALIZE_OPEN_ACTIVITIES_RPC, {"p_user_id": user_id}).execute()
+            if getattr(resp, "error", None):
+                logger.error("Erro na finalização em lote (RPC): %s", resp.error)
+                return 0
+            finalizadas = len(getattr(resp, "data", None) or [])
+            _invalidate(user_id)
+            logger.info("Finalização em lote (RPC) concluída: %d finalizadas.", finalizadas)
+            return finalizadas
+        except APIError as e:
+            if not _erro_rpc_ausente(e):
+                logger.exception("Erro na finalização em lote (RPC): %s", e)
+                return 0
+            _marcar_rpc_ausente(FINALIZE_OPEN_ACTIVITIES_RPC, FINALIZE_OPEN_ACTIVITIES_SQL)
+        except Exception as e:
+            # timeout/rede: o fallback também falharia; não repetir requisições no encerramento
+            logger.exception("Erro na finalização em lote (RPC): %s", e)
+            return 0
+    return _finalizar_em_andamento_por_id(supabase_client, user_id)
+
+
+def _safe_finalize(activity_id: int, supabase_client: Client) -> bool:
+    """
+    Chama finalizar_atividade(...) e retorna True/False em vez de propagar exceções,
+    para que uma falha não interrompa a finalização das demais.
+    """
+    try:
+        # chama sua função existente que já calcula horas e faz update
+        return finalizar_atividade(activity_id, supabase_client=supabase_client)
+    except Exception as e:
+        logger.exception("Falha ao finalizar atividade id=%s: %s", activity_id, e)
+        return False
+
+
+def _finalizar_em_andamento_por_id(supabase_client: Client, user_id: Optional[str] = None) -> int:
+    """
+    Fallback de finalizar_atividades_em_andamento (quando a RPC não existe):
+    busca as atividades sem 'fim', calcula as horas em Python e grava 'fim' e
+    'horas_trabalhadas' juntos em uma única requisição (upsert por id).
+    Se o upsert falhar (nada foi gravado), finaliza cada id com finalizar_atividade(...) em paralelo.
+    """
     try:
-        # busca ids das atividades sem fim
-        resp = supabase_client.table(TABLE_NAME).select("id").is_("fim", None).execute()
+        # busca as atividades sem fim (com as colunas obrigatórias, exigidas pelo upsert)
+        query = supabase_client.table(TABLE_NAME).select(
+            "id, tipo_atividade, descricao, inicio, user_id"
+        ).is_("fim", None)
+        if user_id is not None:
+            query = query.eq("user_id", user_id)
+        resp = query.execute()
         if getattr(resp, "error", None):
             logger.error("Erro ao buscar atividades em andamento: %s", resp.error)
             return 0
 
-        rows = getattr(resp, "data", []) or []
-        ids = [r["id"] for r in rows if "id" in r]
-
-        sucesso = 0
-        for act_id in ids:
-            try:
-                # chama sua função existente que já calcula horas e faz update
-                finalizar_atividade(act_id, supabase_client=supabase_client)
-                sucesso += 1
-            except Exception as e:
-                logger.exception("Falha ao finalizar atividade id=%s: %s", act_id, e)
-                # continua tentando as próximas
+        rows = [r for r in (getattr(resp, "data", []) or []) if "id" in r]
+        ids = [r["id"] for r in rows]
+
+        if not ids:
+            logger.info("Nenhuma atividade em andamento para finalizar.")
+            return 0
+
+        # um único UPSERT (INSERT ... ON CONFLICT (id) DO UPDATE): cada linha recebe
+        # 'fim' e 'horas_trabalhadas' na mesma instrução
+        try:
+            fim: datetime = datetime.now(TIMEZONE)
+            fim_iso: str = fim.isoformat()
+            linhas = [
+                {**r, "fim": fim_iso, "horas_trabalhadas": calcular_horas_trabalhadas(_parse_inicio(r["inicio"]), fim)}
+                for r in rows
+            ]
+            up = supabase_client.table(TABLE_NAME).upsert(
+                linhas, on_conflict="id", returning=ReturnMethod.minimal
+            ).execute()
+            if getattr(up, "error", None):
+                raise RuntimeError(up.error)
+            _invalidate(user_id)
+            logger.info("Finalização em lote (upsert) concluída: %d finalizadas.", len(ids))
+            return len(ids)
+        except Exception as e:
+            logger.warning("Upsert em lote falhou (%s); finalizando por id.", e)
+
+        # finaliza em paralelo (cliente compartilhado; cada requisição usa sua própria conexão)
+        with ThreadPoolExecutor(max_workers=min(FINALIZE_MAX_WORKERS, len(ids))) as ex:
+            sucesso = sum(ex.map(lambda act_id: _safe_finalize(act_id, supabase_client), ids))
         logger.info("Finalização em lote concluída: %d finalizadas, %d falhas (total=%d).",
                     sucesso, len(ids) - sucesso, len(ids))
         return sucesso
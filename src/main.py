@@ -20,6 +20,8 @@ import threading
 from typing import List
 import src.functions as fn  # type: ignore
 
+from kivy.app import App
+from kivy.clock import Clock
 from kivy.core.window import Window
 
 # Tentativa de importar handle_db de forma compatível com execução como pacote ou arquivo
@@ -35,12 +37,37 @@ except Exception:
         ) from e
 
 
+# Garante uma única finalização em lote por encerramento: on_request_close, on_stop,
+# atexit e sinais podem disparar em sequência (ou ao mesmo tempo).
+_FINALIZED = threading.Event()
+_FINALIZE_LOCK = threading.Lock()
+
+
+def _claim_finalize() -> bool:
+    """
+    Retorna True apenas para o primeiro chamador; os seguintes recebem False.
+    Usa acquire não-bloqueante: seguro também dentro de handlers de sinal.
+    """
+    if _FINALIZED.is_set() or not _FINALIZE_LOCK.acquire(blocking=False):
+        return False
+    try:
+        if _FINALIZED.is_set():
+            return False
+        _FINALIZED.set()
+        return True
+    finally:
+        _FINALIZE_LOCK.release()
+
+
 def _finalize_ativos_threaded() -> None:
     """
     Inicia uma thread daemon que executa finalizar_atividades_em_andamento().
-    Não bloqueia o encerramento do processo — usado em atexit/sinais e em on_stop wrapper
+    Não bloqueia o encerramento do processo — usado em atexit, on_stop wrapper e sinais (sem App rodando)
     para não travar o fluxo de desligamento da UI.
+    Não faz nada se a finalização já foi disparada por outro caminho.
     """
+    if not _claim_finalize():
+        return
     try:
         t = threading.Thread(target=db.finalizar_atividades_em_andamento, daemon=True)
         t.start()
@@ -52,7 +79,10 @@ def _finalize_ativos_blocking(timeout: float = 3.0) -> None:
     """
     Inicia uma thread NÃO-daemon para finalizar atividades e aguarda até `timeout` segundos.
     Usado em on_request_close (fechar janela) para dar maior chance de completar as operações.
+    Não faz nada se a finalização já foi disparada por outro caminho.
     """
+    if not _claim_finalize():
+        return
     try:
         t = threading.Thread(target=db.finalizar_atividades_em_andamento, daemon=False)
         t.start()
@@ -65,6 +95,21 @@ def _finalize_ativos_blocking(timeout: float = 3.0) -> None:
         print("[main] erro ao rodar finalização bloqueante:", e)
 
 
+def _on_signal(signum, frame) -> None:
+    """
+    Handler de SIGINT/SIGTERM: encerra a aplicação de fato.
+    Com a App rodando, agenda app.stop() no Clock (on_stop dispara a finalização);
+    sem App rodando, apenas dispara a finalização. Não reivindica a finalização
+    enquanto a UI continua aberta — senão atividades iniciadas depois do sinal
+    não seriam finalizadas ao fechar a janela.
+    """
+    running = App.get_running_app()
+    if running is None:
+        _finalize_ativos_threaded()
+        return
+    Clock.schedule_once(lambda dt: running.stop(), 0)
+
+
 def main(args: list) -> None:
     """
     Função principal que prepara o ambiente e executa a aplicação.
@@ -121,8 +166,8 @@ def main(args: list) -> None:
         # Registrar finalização via atexit e sinais POSIX (fallbacks adicionais)
         atexit.register(_finalize_ativos_threaded)
         try:
-            signal.signal(signal.SIGINT, lambda signum, frame: _finalize_ativos_threaded())
-            signal.signal(signal.SIGTERM, lambda signum, frame: _finalize_ativos_threaded())
+            signal.signal(signal.SIGINT, _on_signal)
+            signal.signal(signal.SIGTERM, _on_signal)
         except Exception:
             # Em alguns ambientes (ex.: Windows GUI) registro de sinais pode falhar — ignoramos.
             pass